@@ -0,0 +1,55 @@
+# app/article_fields.py - typed column values derived from the article's text fields
+
+# Higher rank = more urgent, so "ORDER BY impact_rank DESC" puts critical items first.
+IMPACT_RANKS = {"routine": 0, "important": 1, "critical": 2}
+IMPACT_LEVELS_BY_RANK = {rank: level for level, rank in IMPACT_RANKS.items()}
+_IMPACT_ALIASES = {"high": "critical", "medium": "important", "low": "routine"}
+
+SENTIMENT_BUCKETS = {"negative": -1, "neutral": 0, "positive": 1}
+SENTIMENT_BUCKET_NAMES = {value: name for name, value in SENTIMENT_BUCKETS.items()}
+
+
+def normalize_impact_level(value: str | None) -> str:
+    key = str(value or "").strip().lower()
+    key = _IMPACT_ALIASES.get(key, key)
+    return key if key in IMPACT_RANKS else ""
+
+
+def impact_rank(value: str | None) -> int | None:
+    level = normalize_impact_level(value)
+    return IMPACT_RANKS[level] if level else None
+
+
+def sentiment_bucket(contextual: str | None) -> int:
+    # "<sentiment> for <subject>" -> -1/0/1; mixed and uncertain count as neutral, like the dashboard.
+    label = str(contextual or "").split(" for ", 1)[0].strip().lower()
+    if "positive" in label:
+        return SENTIMENT_BUCKETS["positive"]
+    if "negative" in label:
+        return SENTIMENT_BUCKETS["negative"]
+    return SENTIMENT_BUCKETS["neutral"]
+
+
+def confidence_score(value: str | float | None) -> float | None:
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if score != score:
+        return None
+    return min(max(score, 0.0), 1.0)
+
+
+def country_code(value: str | None) -> str | None:
+    code = str(value or "").strip().upper()
+    return code if len(code) == 2 and code.isalpha() else None
+
+
+def typed_fields(sentiment_confidence, impact_level, sentiment_contextual, country) -> dict:
+    return {
+        "confidence_score": confidence_score(sentiment_confidence),
+        "impact_rank": impact_rank(impact_level),
+        "sentiment_bucket": sentiment_bucket(sentiment_contextual),
+        # Leave anything that is not a two-letter code as it was rather than dropping it.
+        "country": country_code(country) or country,
+    }
@@ -0,0 +1,32 @@
+# app/async_db.py - async (aiosqlite) read sessions for the API's read endpoints
+#
+# Writes (fetch, backfill, retention) stay on the sync engines in app/db.py. Reads awaited here
+# give the event loop back while SQLite is busy instead of parking a threadpool worker.
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.db import DB_PERF_MODE, DB_READ_POOL_SIZE, SQLALCHEMY_DATABASE_URL, apply_perf_pragmas
+from app.retention import ARCHIVE_DB_PATH
+
+
+def _async_url(url: str) -> str:
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1) if url.startswith("sqlite://") else url
+
+
+def create_async_read_engine(url: str = SQLALCHEMY_DATABASE_URL, perf_mode: bool = DB_PERF_MODE):
+    engine = create_async_engine(_async_url(url), pool_size=DB_READ_POOL_SIZE, max_overflow=DB_READ_POOL_SIZE)
+    if perf_mode:
+        # Same pragmas as the sync readers, applied to the driver connection behind the adapter.
+        apply_perf_pragmas(engine.sync_engine, read_only=True)
+    return engine
+
+
+async_read_engine = create_async_read_engine()
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+async_archive_engine = create_async_engine(_async_url(f"sqlite:///{ARCHIVE_DB_PATH}"))
+AsyncArchiveSessionLocal = async_sessionmaker(async_archive_engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_async_engines() -> None:
+    await async_read_engine.dispose()
+    await async_archive_engine.dispose()
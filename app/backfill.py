@@ -0,0 +1,348 @@
+# app/backfill.py - re-run enrichment stages over stored articles without re-fetching
+#
+#   python -m app.backfill --stages sentiment,category --only-degraded
+
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import update
+from app.db import ReadSessionLocal, SessionLocal, writer_job_lock
+from app.models import Article, ArticleContent
+from app.article_fields import typed_fields
+from app.budget import CATEGORY_SHARE_S, SENTIMENT_SHARE_S, ArticleBudget
+from app.category_classifier import classify_category
+from app.content_store import build_content, content_text
+from app.llm_circuit import llm_circuit_wait_s
+from app.metrics import QUEUE_DEPTH
+from app.news_fetcher import get_fetch_status
+from app.sentiment import get_dual_sentiment
+from app.summarizer import generate_summary
+from app.text_analysis import TextAnalysis
+from app.utils import extract_full_text_with_meta
+
+BACKFILL_STAGES = ("summary", "sentiment", "category")
+# Fewer workers than a fetch, so a backfill leaves LLM headroom for new articles.
+BACKFILL_WORKERS = int(os.getenv("AIDA_BACKFILL_WORKERS", "2"))
+BACKFILL_CHUNK_SIZE = int(os.getenv("AIDA_BACKFILL_CHUNK_SIZE", "50"))
+_DOWNLOAD_TIMEOUT_S = 15
+_FETCH_ACTIVE_STATES = ("starting", "fetching", "processing")
+_PAUSE_POLL_S = 5.0
+_MAX_CIRCUIT_WAIT_S = 300.0
+_FALLBACK_REASONS = ("default:", "local rules:")
+_WRITE_ATTEMPTS = 3
+_WRITE_RETRY_S = 5.0
+
+_backfill_status_lock = threading.Lock()
+_backfill_status = {
+    "state": "idle",
+    "message": "Idle",
+    "stages": [],
+    "only_degraded": False,
+    "total": 0,
+    "processed": 0,
+    "updated": 0,
+    "errors": 0,
+    "last_id": 0,
+    "started_at_utc": None,
+    "finished_at_utc": None,
+}
+_backfill_stop_event = threading.Event()
+
+
+def _now_utc_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _set_backfill_status(**updates):
+    with _backfill_status_lock:
+        _backfill_status.update(updates)
+
+
+def _bump_backfill_status(**increments):
+    with _backfill_status_lock:
+        for key, value in increments.items():
+            _backfill_status[key] += value
+
+
+def get_backfill_status():
+    with _backfill_status_lock:
+        return dict(_backfill_status)
+
+
+def is_backfill_running() -> bool:
+    return get_backfill_status()["state"] in ("starting", "running", "paused")
+
+
+def mark_backfill_requested(stages: list[str], only_degraded: bool):
+    # Cleared here rather than in run_backfill, so a stop sent while the job is starting still counts.
+    _backfill_stop_event.clear()
+    _set_backfill_status(
+        state="starting",
+        message="Starting backfill...",
+        stages=list(stages),
+        only_degraded=only_degraded,
+        total=0,
+        processed=0,
+        updated=0,
+        errors=0,
+        last_id=0,
+        started_at_utc=_now_utc_iso(),
+        finished_at_utc=None,
+    )
+
+
+def request_backfill_stop():
+    _backfill_stop_event.set()
+    if is_backfill_running():
+        _set_backfill_status(message="Stopping after the current chunk...")
+
+
+def parse_stages(value: str | list[str]) -> list[str]:
+    names = value.split(",") if isinstance(value, str) else value
+    stages = [name.strip().lower() for name in names if name and name.strip()]
+    unknown = sorted(set(stages) - set(BACKFILL_STAGES))
+    if unknown or not stages:
+        raise ValueError(f"Unknown backfill stages {unknown}; choose from {', '.join(BACKFILL_STAGES)}.")
+    # Run in pipeline order, since sentiment and category read the summary.
+    return [stage for stage in BACKFILL_STAGES if stage in stages]
+
+
+def _wait_until_clear() -> bool:
+    # Pauses while a fetch owns the writer or the LLM circuit is open; False when asked to stop.
+    while not _backfill_stop_event.is_set():
+        if get_fetch_status().get("state") in _FETCH_ACTIVE_STATES:
+            reason = "a fetch is running"
+            delay = _PAUSE_POLL_S
+        else:
+            delay = min(llm_circuit_wait_s(), _MAX_CIRCUIT_WAIT_S)
+            reason = "the LLM circuit is open"
+        if delay <= 0:
+            _set_backfill_status(state="running")
+            return True
+        _set_backfill_status(state="paused", message=f"Paused: {reason}.")
+        _backfill_stop_event.wait(delay)
+    return False
+
+
+def _article_filter(query, only_degraded: bool):
+    if only_degraded:
+        return query.filter(Article.degraded_stages.isnot(None))
+    return query
+
+
+def _reenrich(row, stored_text: str | None, stages: list[str]) -> tuple[dict, object]:
+    # Returns (column updates, new ArticleContent or None) for one article.
+    budget = ArticleBudget()
+    previous = set((row.degraded_stages or "").split(",")) - {""}
+    updates = {}
+    new_content = None
+    written = set()
+    summary = row.summary
+    if "summary" in stages:
+        text = stored_text
+        if not text and row.url:
+            downloaded, extraction = extract_full_text_with_meta(row.url, timeout=_DOWNLOAD_TIMEOUT_S)
+            if downloaded:
+                text = TextAnalysis(downloaded, clean=True).normalized
+                new_content = build_content(text, extraction)
+        if text:
+            body = TextAnalysis(text)
+            reserve = (SENTIMENT_SHARE_S if "sentiment" in stages else 0.0) + (
+                CATEGORY_SHARE_S if "category" in stages else 0.0
+            )
+            candidate = generate_summary(body.normalized, budget=budget.reserving(reserve), analysis=body)
+            source = budget.sources.get("summary")
+            # Only an LLM summary replaces a stored one, unless the stored one was degraded; the
+            # "default" result is the input text itself and is never written.
+            if source == "llm" or ("summary" in previous and source not in (None, "default")):
+                summary = candidate
+                updates["summary"] = summary
+                written.add("summary")
+        else:
+            print(f"Backfill: no stored or downloadable text for article {row.id}, keeping its summary.")
+
+    headline = TextAnalysis(f"{row.title or ''} {summary or ''}")
+    if "sentiment" in stages:
+        emotional, contextual, confidence, impact_level, reason = get_dual_sentiment(
+            row.title,
+            summary,
+            budget=budget.reserving(CATEGORY_SHARE_S if "category" in stages else 0.0),
+            analysis=headline,
+        )
+        had_llm_result = bool(row.impact_reason) and not row.impact_reason.startswith(_FALLBACK_REASONS)
+        fallback = (reason or "").startswith(_FALLBACK_REASONS) or "sentiment" in budget.degraded
+        # Never replace an LLM judgement with the local fallback.
+        if not (had_llm_result and fallback and "sentiment" not in previous):
+            updates.update(
+                sentiment_emotional=emotional,
+                sentiment_contextual=contextual,
+                sentiment_confidence=confidence,
+                impact_level=impact_level,
+                impact_reason=reason,
+            )
+            # Bulk updates skip the ORM listener, so derive the typed columns here.
+            fields = typed_fields(confidence, impact_level, contextual, None)
+            fields.pop("country")
+            updates.update(fields)
+            written.add("sentiment")
+    if "category" in stages:
+        category = classify_category(headline.normalized, budget=budget, analysis=headline)
+        source = budget.sources.get("category")
+        # Rules and the local classifiers never replace a stored category that was not degraded.
+        if source == "llm" or ("category" in previous and source not in (None, "default")):
+            updates["category"] = category
+            written.add("category")
+
+    # A stage stays flagged if its stored value was kept or the new one is degraded too.
+    degraded = {stage for stage in previous if stage not in written or stage in budget.degraded}
+    updates["degraded_stages"] = ",".join(sorted(degraded)) or None
+    return updates, new_content
+
+
+def _write_chunk(updates: list[dict], contents: list) -> None:
+    with writer_job_lock:
+        _write_chunk_locked(updates, contents)
+
+
+def _write_chunk_locked(updates: list[dict], contents: list) -> None:
+    db = SessionLocal()
+    try:
+        if updates:
+            db.execute(update(Article), updates)
+        for content in contents:
+            db.merge(content)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _write_chunk_retrying(updates: list[dict], contents: list) -> bool:
+    # A failed write (lock or pool timeout) costs this chunk, not the whole backfill.
+    for attempt in range(1, _WRITE_ATTEMPTS + 1):
+        try:
+            _write_chunk(updates, contents)
+            return True
+        except Exception as exc:
+            print(f"Backfill chunk write failed (attempt {attempt}/{_WRITE_ATTEMPTS}): {exc}")
+            if attempt < _WRITE_ATTEMPTS and _backfill_stop_event.wait(_WRITE_RETRY_S):
+                break
+    return False
+
+
+def _run_pass(stages: list[str], only_degraded: bool, skip_ids: set[int], limit: int | None, workers: int) -> bool:
+    # One keyset-paginated walk over articles; adds what it handled to skip_ids, returns False if stopped.
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="aida-backfill") as pool:
+        while True:
+            if not _wait_until_clear():
+                return False
+            remaining = None if limit is None else limit - get_backfill_status()["processed"]
+            if remaining is not None and remaining <= 0:
+                return True
+            db = ReadSessionLocal()
+            try:
+                query = _article_filter(
+                    db.query(
+                        Article.id, Article.title, Article.summary, Article.url,
+                        Article.impact_reason, Article.degraded_stages,
+                    ),
+                    only_degraded,
+                ).filter(Article.id > last_id)
+                size = BACKFILL_CHUNK_SIZE if remaining is None else min(BACKFILL_CHUNK_SIZE, remaining)
+                page = query.order_by(Article.id).limit(size).all()
+                rows = [row for row in page if row.id not in skip_ids]
+                stored = {}
+                if rows and "summary" in stages:
+                    ids = [row.id for row in rows]
+                    for content in db.query(ArticleContent).filter(ArticleContent.article_id.in_(ids)).all():
+                        stored[content.article_id] = content_text(content)
+            finally:
+                db.close()
+            if not page:
+                return True
+            last_id = page[-1].id
+            if not rows:
+                continue
+
+            futures = {row.id: pool.submit(_reenrich, row, stored.get(row.id), stages) for row in rows}
+            QUEUE_DEPTH.set(len(futures), queue="backfill")
+            updates = []
+            contents = []
+            for article_id, future in futures.items():
+                try:
+                    changes, content = future.result()
+                except Exception as exc:
+                    print(f"Backfill failed for article {article_id}: {exc}")
+                    _bump_backfill_status(errors=1)
+                    continue
+                finally:
+                    QUEUE_DEPTH.dec(queue="backfill")
+                updates.append(dict(changes, id=article_id))
+                if content is not None:
+                    content.article_id = article_id
+                    contents.append(content)
+            if not _wait_until_clear():
+                return False
+            skip_ids.update(row.id for row in rows)
+            if _write_chunk_retrying(updates, contents):
+                _bump_backfill_status(processed=len(rows), updated=len(updates))
+            else:
+                print(f"Backfill skipped a chunk of {len(rows)} articles up to id {last_id}.")
+                _bump_backfill_status(processed=len(rows), errors=len(updates))
+            status = get_backfill_status()
+            _set_backfill_status(
+                last_id=last_id,
+                message=f"Backfilled {status['processed']}/{status['total']} articles",
+            )
+
+
+def run_backfill(
+    stages: list[str],
+    only_degraded: bool = False,
+    limit: int | None = None,
+    workers: int = BACKFILL_WORKERS,
+):
+    stages = parse_stages(stages)
+    if get_backfill_status()["state"] != "starting":
+        mark_backfill_requested(stages, only_degraded)
+    db = ReadSessionLocal()
+    try:
+        total = _article_filter(db.query(Article.id), only_degraded).count()
+    finally:
+        db.close()
+    if limit is not None:
+        total = min(total, limit)
+    _set_backfill_status(state="running", total=total, message=f"Backfilled 0/{total} articles")
+    print(f"Backfill starting: stages={','.join(stages)} articles={total}")
+    try:
+        # Degraded articles first: they are the ones still waiting for a full-quality pass.
+        done_ids = set()
+        passes = [True] if only_degraded else [True, False]
+        for degraded_only in passes:
+            if not _run_pass(stages, degraded_only, done_ids, limit, workers):
+                _set_backfill_status(state="canceled", message="Backfill canceled.", finished_at_utc=_now_utc_iso())
+                return
+    except Exception as exc:
+        msg = f"Backfill failed: {exc}"
+        print(msg)
+        _set_backfill_status(state="error", message=msg, finished_at_utc=_now_utc_iso())
+        raise
+    status = get_backfill_status()
+    msg = f"Backfilled {status['processed']} articles ({status['errors']} errors)."
+    print(msg)
+    _set_backfill_status(state="done", message=msg, finished_at_utc=_now_utc_iso())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run enrichment stages over stored articles.")
+    parser.add_argument("--stages", default="sentiment,category", help=f"comma-separated: {','.join(BACKFILL_STAGES)}")
+    parser.add_argument("--only-degraded", action="store_true", help="only articles with degraded_stages set")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    args = parser.parse_args()
+    run_backfill(parse_stages(args.stages), only_degraded=args.only_degraded, limit=args.limit, workers=args.workers)
@@ -0,0 +1,49 @@
+# app/budget.py - per-article time budgets shared by every enrichment stage
+
+import os
+import time
+
+ARTICLE_BUDGET_S = float(os.getenv("AIDA_ARTICLE_BUDGET_S", "90"))
+# Seconds the summary stage leaves for the stages after it, so one slow LLM stage cannot starve the rest.
+SENTIMENT_SHARE_S = 10.0
+CATEGORY_SHARE_S = 10.0
+
+
+class BudgetExhaustedError(RuntimeError):
+    pass
+
+
+class ArticleBudget:
+    def __init__(
+        self,
+        total_s: float = ARTICLE_BUDGET_S,
+        started: float | None = None,
+        degraded: list[str] | None = None,
+        sources: dict[str, str] | None = None,
+    ):
+        self.total_s = total_s
+        self.started = time.monotonic() if started is None else started
+        # Shared with every reserving() view so stages can flag themselves for a later upgrade.
+        self.degraded = [] if degraded is None else degraded
+        # Engine that produced each stage's result (llm, local, extractive, rules, default).
+        self.sources = {} if sources is None else sources
+
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_s(self) -> float:
+        return max(self.total_s - self.elapsed_s(), 0.0)
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining_s() >= seconds
+
+    def reserving(self, seconds: float) -> "ArticleBudget":
+        # A view of this budget that keeps `seconds` back for the stage's cheaper fallback.
+        return ArticleBudget(self.total_s - seconds, started=self.started, degraded=self.degraded, sources=self.sources)
+
+    def mark_degraded(self, stage: str) -> None:
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+    def record_source(self, stage: str, source: str) -> None:
+        self.sources[stage] = source
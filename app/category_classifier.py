@@ -1,10 +1,18 @@
 ﻿# app/category_classifier.py - local + LLM classifier (CPU safe fallback)
 
 from transformers import pipeline
-from groq import Groq
+from app.groq_pool import GroqKeyPool, get_key_pool, groq_keys_from_env
+from app.llm_circuit import check_llm_circuit, record_llm_failure, record_llm_success, release_llm_probe
+from app.hedging import HedgeCancelledError, run_hedged
+from app.budget import ArticleBudget, BudgetExhaustedError
+from app.category_rules import match_category_rules
+from app.text_analysis import TextAnalysis
+from app.metrics import LLM_RATE_LIMIT_WAIT_SECONDS, record_stage_result
 import os
 import json
+import random
 import re
+import threading
 import time
 
 # Force CPU usage (no CUDA)
@@ -14,24 +22,49 @@ _local_classifier = pipeline(
     device=-1
 )
 
-_GROQ_CATEGORY_API_KEY = os.getenv("GROQ_CATEGORY_API_KEY")
-_groq_client = Groq(api_key=_GROQ_CATEGORY_API_KEY) if _GROQ_CATEGORY_API_KEY else None
+# Per-key budgets for llama-3.1-8b-instant; extra keys go in GROQ_CATEGORY_API_KEYS.
+_GROQ_KEY_RPM = 30
+_GROQ_KEY_TPM = 6000
+_GROQ_KEY_RPD = 14400
+_GROQ_CATEGORY_API_KEYS = groq_keys_from_env("GROQ_CATEGORY_API_KEY")
+_groq_pool = get_key_pool(
+    "category", _GROQ_CATEGORY_API_KEYS, rpm=_GROQ_KEY_RPM, tpm=_GROQ_KEY_TPM, rpd=_GROQ_KEY_RPD
+)
 
 _RATE_LIMIT_RE = re.compile(r"try again in ([0-9.]+)s", re.IGNORECASE)
 _RETRY_BUFFER_S = 2.0
 _DEFAULT_RETRY_S = 2.0
 _MAX_RETRIES = 20
+_MIN_LLM_BUDGET_S = 3.0
+# Time the CPU zero-shot classifier needs once the LLM has given up.
+_LOCAL_CATEGORY_RESERVE_S = 6.0
 USE_KEYWORD_FILTER = True
 _MIN_FILTER_CHARS = 280
 _MAX_LLM_INPUT_CHARS = 1200
+# Race the LLM against bart-large-mnli once it runs past the observed p90 latency.
+USE_HEDGING = os.getenv("AIDA_USE_HEDGING") == "1"
+# "llm_first" (default) asks Groq first; "cascade" runs the local classifier first and only
+# escalates to Groq when its top-1/top-2 score margin is below CASCADE_MARGIN.
+CATEGORY_MODE = os.getenv("AIDA_CATEGORY_MODE", "llm_first")
+# Keyword/phrase fast path that settles obvious headlines before any model runs.
+USE_RULE_TAGGER = os.getenv("AIDA_CATEGORY_RULES", "1") == "1"
+CASCADE_MARGIN = float(os.getenv("AIDA_CATEGORY_CASCADE_MARGIN", "0.25"))
+# Share of confident local answers still sent to Groq, so agreement above the threshold stays measured.
+CASCADE_AUDIT_RATE = float(os.getenv("AIDA_CATEGORY_CASCADE_AUDIT_RATE", "0.0"))
+_MARGIN_BUCKET_WIDTH = 0.1
 
-_STOPWORDS = {
-    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
-    "he", "in", "is", "it", "its", "of", "on", "that", "the", "to", "was",
-    "were", "will", "with", "you", "your", "they", "their", "them", "this",
-    "these", "those", "or", "but", "not", "have", "had", "been", "if",
+_cascade_lock = threading.Lock()
+_cascade_stats = {
+    "items": 0,
+    "accepted_local": 0,
+    "escalated": 0,
+    "audited": 0,
+    "compared": 0,
+    "agreed": 0,
+    "agreement_by_margin": {},
 }
 
+
 def _retry_after_s(exc: Exception) -> float | None:
     response = getattr(exc, "response", None)
     headers = getattr(response, "headers", None)
@@ -72,11 +105,27 @@ def _is_tpm_rate_limit(exc: Exception) -> bool:
         return True
     return False
 
-def _call_groq_with_retry(client: Groq, **kwargs):
+def _call_groq_with_retry(
+    pool: GroqKeyPool,
+    cancel_event: threading.Event | None = None,
+    budget: ArticleBudget | None = None,
+    **kwargs,
+):
+    is_probe = check_llm_circuit("LLM category")
     total_attempts = max(_MAX_RETRIES, 1)
     for attempt in range(total_attempts):
+        if cancel_event is not None and cancel_event.is_set():
+            if is_probe:
+                release_llm_probe()
+            raise HedgeCancelledError("LLM category canceled: local classifier won the hedge.")
+        if budget is not None:
+            if not budget.allows(_MIN_LLM_BUDGET_S):
+                if is_probe:
+                    release_llm_probe()
+                raise BudgetExhaustedError("LLM category skipped: article time budget exhausted.")
+            kwargs["timeout"] = budget.remaining_s()
         try:
-            return client.chat.completions.create(**kwargs)
+            response = pool.create(**kwargs)
         except Exception as exc:
             message = str(exc)
             is_rate_limit = "rate limit" in message.lower() or "429" in message
@@ -89,146 +138,238 @@ def _call_groq_with_retry(client: Groq, **kwargs):
                         if delay is None:
                             delay = _DEFAULT_RETRY_S
                         delay = delay + _RETRY_BUFFER_S
+                        if budget is not None and not budget.allows(delay + _MIN_LLM_BUDGET_S):
+                            print("LLM category rate limited (TPM). Not enough time budget left to wait.")
+                            if is_probe:
+                                release_llm_probe()
+                            raise BudgetExhaustedError("LLM category gave up: article time budget exhausted.") from exc
                         attempt_label = f"{attempt + 1}/{total_attempts}"
                         wait_start = time.perf_counter()
                         print(
                             "LLM category rate limited (TPM). "
                             f"Retrying in {delay:.2f}s (attempt {attempt_label})..."
                         )
-                        time.sleep(max(delay, 0.5))
+                        if cancel_event is not None:
+                            cancel_event.wait(max(delay, 0.5))
+                        else:
+                            time.sleep(max(delay, 0.5))
                         waited = time.perf_counter() - wait_start
+                        LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, stage="category")
                         print(f"LLM category retry wait complete: {waited:.2f}s.")
                         continue
                     print("LLM category rate limited (TPM). Retries exhausted.")
                 else:
                     print("LLM category rate limited (RPD). Skipping retry.")
+            record_llm_failure(exc)
             raise
+        record_llm_success()
+        return response
 
-def _split_sentences(text: str) -> list[str]:
-    cleaned = " ".join(text.split())
-    if not cleaned:
-        return []
-    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z0-9])", cleaned)
-    return [part.strip() for part in parts if part.strip()]
+CATEGORY_LABELS = [
+    "politics",
+    "geopolitics",
+    "war",
+    "economy",
+    "finance",
+    "stocks",
+    "business",
+    "technology",
+    "science",
+    "health",
+    "energy",
+    "environment",
+    "crypto",
+    "sports",
+    "entertainment",
+    "travel",
+    "education",
+    "crime",
+    "global",
+    "general",
+]
 
-def _extract_keywords(sentences: list[str], top_n: int = 12) -> set[str]:
-    tokens = re.findall(r"[A-Za-z0-9']+", " ".join(sentences))
-    freq = {}
-    for token in tokens:
-        key = token.lower()
-        if key in _STOPWORDS:
-            continue
-        if len(key) < 3 and not key.isdigit():
-            continue
-        freq[key] = freq.get(key, 0) + 1
-    sorted_items = sorted(freq.items(), key=lambda item: item[1], reverse=True)
-    return {word for word, _ in sorted_items[:top_n]}
+def _llm_category(
+    analysis: TextAnalysis,
+    labels: list[str],
+    cancel_event: threading.Event | None = None,
+    budget: ArticleBudget | None = None,
+) -> str | None:
+    try:
+        text_for_llm = analysis.normalized
+        if USE_KEYWORD_FILTER:
+            text_for_llm = analysis.filtered(4, _MIN_FILTER_CHARS)
+        prompt = {
+            "task": "Choose the best category for the news item.",
+            "rules": [
+                "Pick exactly one label from the list.",
+                "Use 'global' for cross-border, international items that are not primarily politics/war.",
+                "Use 'general' when nothing else fits.",
+                "Return JSON only: {\"category\": \"<label>\"}."
+            ],
+            "labels": labels,
+            "text": text_for_llm[:_MAX_LLM_INPUT_CHARS]
+        }
+        response = _call_groq_with_retry(
+            _groq_pool,
+            cancel_event=cancel_event,
+            budget=budget,
+            model="llama-3.1-8b-instant",
+            messages=[{"role": "user", "content": json.dumps(prompt)}],
+            temperature=0.0,
+            max_tokens=60,
+        )
+        raw = response.choices[0].message.content.strip()
+        if not raw:
+            print("LLM category empty response, using local.")
+            return None
+        category = _parse_llm_category(raw, labels)
+        if category:
+            return category
+        print(f"LLM category raw response: {raw[:400]}")
+        print("LLM category response unparseable, using local.")
+    except Exception as exc:
+        print(f"Category LLM failed, using local classifier: {exc}")
+        if isinstance(exc, BudgetExhaustedError) and budget is not None:
+            budget.mark_degraded("category")
+    return None
 
-def _select_summary_input(text: str, max_sentences: int = 4) -> str:
-    sentences = _split_sentences(text)
-    if len(sentences) <= max_sentences:
-        return text
-    keywords = _extract_keywords(sentences)
-    if not keywords:
-        return " ".join(sentences[:max_sentences])
+def _local_zero_shot(text: str, labels: list[str]) -> tuple[str, float] | None:
+    # Returns the top label and its score margin over the runner-up.
+    try:
+        result = _local_classifier(
+            text,
+            candidate_labels=labels
+        )
+    except Exception as e:
+        print(f"Category classification failed: {e}")
+        return None
+    scores = result["scores"]
+    margin = scores[0] - scores[1] if len(scores) > 1 else scores[0]
+    return result["labels"][0], margin
 
-    def score(sentence: str) -> int:
-        words = set(re.findall(r"[A-Za-z0-9']+", sentence.lower()))
-        return len(words & keywords)
+def _local_category(text: str, labels: list[str]) -> str | None:
+    print(">>> LOCAL CATEGORY CLASSIFIER (CPU) <<<")
+    local = _local_zero_shot(text, labels)
+    return local[0] if local else None
 
-    lead = sentences[:2]
-    tail = sorted(sentences[2:], key=lambda s: (score(s), len(s)), reverse=True)
-    selected = list(lead)
-    for sentence in tail:
-        if score(sentence) == 0:
-            continue
-        selected.append(sentence)
-        if len(selected) >= max_sentences:
-            break
-    if len(selected) < 3:
-        selected = sentences[:max_sentences]
-    selected_set = set(selected)
-    ordered = [sentence for sentence in sentences if sentence in selected_set]
-    return " ".join(ordered)
+def _record_source(budget: ArticleBudget | None, source: str) -> None:
+    record_stage_result("category", source)
+    if budget is not None:
+        budget.record_source("category", source)
 
-def classify_category(text: str) -> str:
-    labels = [
-        "politics",
-        "geopolitics",
-        "war",
-        "economy",
-        "finance",
-        "stocks",
-        "business",
-        "technology",
-        "science",
-        "health",
-        "energy",
-        "environment",
-        "crypto",
-        "sports",
-        "entertainment",
-        "travel",
-        "education",
-        "crime",
-        "global",
-        "general",
-    ]
+def _local_result(label: str | None, budget: ArticleBudget | None) -> str:
+    _record_source(budget, "local" if label else "default")
+    return label or "general"
 
-    if not _groq_client:
-        print("LLM category disabled: GROQ_CATEGORY_API_KEY not set.")
-    elif not text or not text.strip():
-        print("LLM category skipped: empty text.")
-    else:
-        try:
-            text_for_llm = " ".join(text.split())
-            if USE_KEYWORD_FILTER:
-                filtered = _select_summary_input(text_for_llm)
-                if len(filtered) >= _MIN_FILTER_CHARS:
-                    text_for_llm = filtered
-            prompt = {
-                "task": "Choose the best category for the news item.",
-                "rules": [
-                    "Pick exactly one label from the list.",
-                    "Use 'global' for cross-border, international items that are not primarily politics/war.",
-                    "Use 'general' when nothing else fits.",
-                    "Return JSON only: {\"category\": \"<label>\"}."
-                ],
-                "labels": labels,
-                "text": text_for_llm[:_MAX_LLM_INPUT_CHARS]
-            }
-            response = _call_groq_with_retry(
-                _groq_client,
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": json.dumps(prompt)}],
-                temperature=0.0,
-                max_tokens=60,
+def _margin_bucket(margin: float) -> str:
+    lower = min(int(margin / _MARGIN_BUCKET_WIDTH + 1e-9), int(1 / _MARGIN_BUCKET_WIDTH) - 1) * _MARGIN_BUCKET_WIDTH
+    return f"{lower:.2f}-{lower + _MARGIN_BUCKET_WIDTH:.2f}"
+
+def _record_cascade(*counters: str, margin: float | None = None, agreed: bool = False) -> None:
+    with _cascade_lock:
+        for name in counters:
+            _cascade_stats[name] += 1
+        if margin is not None:
+            entry = _cascade_stats["agreement_by_margin"].setdefault(
+                _margin_bucket(margin), {"compared": 0, "agreed": 0}
             )
-            raw = response.choices[0].message.content.strip()
-            if not raw:
-                print("LLM category empty response, using local.")
-            else:
-                category = _parse_llm_category(raw, labels)
-                if category:
-                    print(">>> LLM CATEGORY CLASSIFIER <<<")
-                    return category
-                print(f"LLM category raw response: {raw[:400]}")
-                print("LLM category response unparseable, using local.")
-        except Exception as exc:
-            print(f"Category LLM failed, using local classifier: {exc}")
+            entry["compared"] += 1
+            entry["agreed"] += int(agreed)
 
-    print(">>> LOCAL CATEGORY CLASSIFIER (CPU) <<<")
+def get_category_cascade_stats() -> dict:
+    with _cascade_lock:
+        stats = dict(_cascade_stats)
+        stats["agreement_by_margin"] = {
+            bucket: dict(entry) for bucket, entry in sorted(_cascade_stats["agreement_by_margin"].items())
+        }
+    items = stats["items"] or 1
+    compared = stats["compared"] or 1
+    stats["mode"] = CATEGORY_MODE
+    stats["margin_threshold"] = CASCADE_MARGIN
+    stats["escalation_rate"] = round(stats["escalated"] / items, 4)
+    stats["agreement_rate"] = round(stats["agreed"] / compared, 4) if stats["compared"] else None
+    return stats
 
-    try:
-        result = _local_classifier(
-            text,
-            candidate_labels=labels
+def _cascade_category(analysis: TextAnalysis, labels: list[str], budget: ArticleBudget | None) -> str:
+    _record_cascade("items")
+    text = analysis.normalized
+    local = _local_zero_shot(text, labels)
+    if local is None:
+        local_label, margin = None, 0.0
+    else:
+        local_label, margin = local
+    audit = local_label is not None and margin >= CASCADE_MARGIN and random.random() < CASCADE_AUDIT_RATE
+    if local_label is not None and margin >= CASCADE_MARGIN and not audit:
+        _record_cascade("accepted_local")
+        print(f">>> LOCAL CATEGORY CLASSIFIER (CASCADE, margin={margin:.2f}) <<<")
+        return _local_result(local_label, budget)
+
+    if not _groq_pool or not text:
+        print(f">>> LOCAL CATEGORY CLASSIFIER (CASCADE, margin={margin:.2f}, LLM unavailable) <<<")
+        return _local_result(local_label, budget)
+    if budget is not None and not budget.allows(_MIN_LLM_BUDGET_S):
+        print("LLM category skipped: article time budget low, keeping local.")
+        budget.mark_degraded("category")
+        return _local_result(local_label, budget)
+
+    _record_cascade("audited" if audit else "escalated")
+    category = _llm_category(analysis, labels, budget=budget)
+    if not category:
+        return _local_result(local_label, budget)
+    print(f">>> LLM CATEGORY CLASSIFIER (CASCADE, margin={margin:.2f}) <<<")
+    _record_source(budget, "llm")
+    if local_label is not None:
+        agreed = category == local_label
+        _record_cascade("compared", *(("agreed",) if agreed else ()), margin=margin, agreed=agreed)
+    return category
+
+def classify_category(text: str, budget: ArticleBudget | None = None, analysis: TextAnalysis | None = None) -> str:
+    labels = CATEGORY_LABELS
+    if analysis is None:
+        analysis = TextAnalysis(text)
+    text = analysis.normalized
+    # The LLM may only spend what is left after keeping enough back for bart-large-mnli.
+    llm_budget = budget.reserving(_LOCAL_CATEGORY_RESERVE_S) if budget is not None else None
+
+    if USE_RULE_TAGGER and text:
+        category = match_category_rules(text, labels)
+        if category:
+            print(">>> RULE CATEGORY TAGGER <<<")
+            _record_source(budget, "rules")
+            return category
+
+    if CATEGORY_MODE == "cascade":
+        return _cascade_category(analysis, labels, budget)
+
+    if not _groq_pool:
+        print("LLM category disabled: GROQ_CATEGORY_API_KEY not set.")
+    elif not text:
+        print("LLM category skipped: empty text.")
+    elif llm_budget is not None and not llm_budget.allows(_MIN_LLM_BUDGET_S):
+        print("LLM category skipped: article time budget low, using local.")
+        budget.mark_degraded("category")
+    elif USE_HEDGING:
+        category, winner = run_hedged(
+            "category",
+            lambda cancel_event: _llm_category(analysis, labels, cancel_event=cancel_event, budget=llm_budget),
+            lambda cancel_event: _local_category(text, labels),
         )
-        return result["labels"][0]
+        if winner == "primary":
+            print(">>> LLM CATEGORY CLASSIFIER <<<")
+            _record_source(budget, "llm")
+            return category
+        if winner == "hedge":
+            print(">>> LOCAL CATEGORY CLASSIFIER (HEDGE WON) <<<")
+            _record_source(budget, "local")
+            return category
+    else:
+        category = _llm_category(analysis, labels, budget=llm_budget)
+        if category:
+            print(">>> LLM CATEGORY CLASSIFIER <<<")
+            _record_source(budget, "llm")
+            return category
 
-    except Exception as e:
-        print(f"Category classification failed: {e}")
-        return "general"
+    return _local_result(_local_category(text, labels), budget)
 
 def _parse_llm_category(raw: str, labels: list[str]) -> str | None:
     cleaned = raw.strip().strip("`").strip()
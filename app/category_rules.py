@@ -0,0 +1,214 @@
+# app/category_rules.py - precompiled keyword/phrase tagger for obvious category cases
+
+import json
+import os
+import re
+import threading
+
+# Phrases are matched case-insensitively on word boundaries; a trailing "*" matches any suffix.
+# Only use "*" where every word with that stem belongs to the label: "stock*" would also match
+# "Stockholm", so short or ambiguous stems are spelled out word by word.
+# Weights: 3 = near-certain signal, 2 = strong, 1 = weak supporting evidence.
+DEFAULT_RULES: dict[str, dict[str, float]] = {
+    "sports": {
+        "nba": 3, "nfl": 3, "mlb": 3, "nhl": 3, "premier league": 3, "champions league": 3, "world cup": 2,
+        "super bowl": 3, "wimbledon": 3, "grand slam": 2, "formula 1": 3, "touchdown*": 3, "quarterback*": 3,
+        "goalkeeper": 3, "hat-trick": 3, "playoff*": 2, "innings": 3, "wicket*": 3, "striker": 2, "coach": 1,
+        "match": 1, "season": 1, "league": 1, "tournament": 2, "olympic*": 2, "scored": 1, "halftime": 3,
+    },
+    "crypto": {
+        "bitcoin": 3, "ethereum": 3, "crypto": 3, "cryptocurrency": 3, "cryptocurrencies": 3,
+        "blockchain": 2, "stablecoin*": 3, "btc": 3, "nft*": 2, "solana": 3, "dogecoin": 3, "coinbase": 3,
+        "binance": 3, "token": 1, "tokens": 1, "digital asset*": 2,
+    },
+    "stocks": {
+        "s&p 500": 3, "nasdaq": 3, "dow jones": 3, "stock market": 3, "wall street": 2, "shares": 1,
+        "stocks": 2, "stock exchange": 3, "stock price": 3, "stock prices": 3, "equities": 3, "ftse": 3, "sti": 2, "nikkei": 3, "share price*": 3, "investors": 1,
+        "earnings per share": 3, "market cap*": 2, "beat estimates": 2,
+    },
+    "war": {
+        "airstrike*": 3, "troops": 2, "ceasefire": 3, "missile*": 2, "shelling": 3, "frontline*": 3,
+        "invasion": 2, "drone strike*": 3, "military offensive": 3, "artillery": 3, "soldiers": 2,
+        "war": 2, "hostage*": 2,
+    },
+    "politics": {
+        "election*": 3, "senate": 2, "congress": 2, "parliament*": 2, "prime minister": 2, "ballot*": 3,
+        "campaign trail": 3, "lawmakers": 2, "legislation": 2, "democrat*": 2, "republican*": 2,
+        "opposition party": 3, "white house": 2, "polls": 1, "voters": 2, "minister": 1,
+    },
+    "geopolitics": {
+        "sanctions": 2, "nato": 3, "united nations": 2, "diplomat*": 2, "foreign minister": 3,
+        "bilateral": 2, "g7": 3, "g20": 3, "trade war": 3, "summit": 1, "embassy": 2,
+    },
+    "economy": {
+        "inflation": 3, "gdp": 3, "unemployment": 3, "interest rate*": 2, "central bank": 2,
+        "federal reserve": 2, "recession": 3, "consumer prices": 3, "jobs report": 3, "cpi": 3,
+        "economy": 2, "economic growth": 3, "tariff*": 1,
+    },
+    "finance": {
+        "banking": 2, "mortgage*": 3, "bond yield*": 3, "treasury yield*": 3, "hedge fund*": 3,
+        "private equity": 3, "ipo": 2, "fintech": 3, "loans": 2, "credit card*": 2, "lender*": 2,
+    },
+    "business": {
+        "ceo": 2, "merger": 3, "acquisition": 2, "earnings": 2, "revenue": 2, "startup*": 2, "layoffs": 2,
+        "retailer*": 2, "quarterly results": 3, "profit*": 1, "company": 1, "chief executive": 2,
+    },
+    "technology": {
+        "artificial intelligence": 3, "ai": 2, "openai": 3, "chatgpt": 3, "software": 2, "smartphone*": 3,
+        "iphone*": 3, "android": 3, "semiconductor*": 3, "chipmaker*": 3, "cybersecurity": 3, "tech": 2,
+        "nvidia": 3, "data center*": 3, "app": 1,
+    },
+    "science": {
+        "nasa": 3, "astronomer*": 3, "telescope": 3, "spacecraft": 3, "scientists": 2, "study finds": 2,
+        "physics": 3, "fossil": 3, "fossils": 3, "fossilised": 3, "fossilized": 3, "genome": 3, "species": 2, "researchers": 1, "asteroid*": 3,
+    },
+    "health": {
+        "covid*": 3, "vaccine*": 3, "hospital": 2, "hospitals": 2, "hospitalised": 2, "hospitalized": 2, "cancer": 3, "disease*": 2, "patients": 2, "fda": 3,
+        "nhs": 3, "medical": 2, "mental health": 3, "obesity": 3, "virus": 2, "doctors": 2,
+    },
+    "energy": {
+        "oil price*": 3, "crude": 3, "opec": 3, "natural gas": 3, "renewable*": 2, "solar": 2,
+        "wind farm*": 3, "nuclear power": 3, "electricity": 2, "power grid": 3, "lng": 3, "pipeline*": 1,
+        # Longer than "fossil", so these win at the same position and keep fuels out of science.
+        "fossil fuel": 2, "fossil fuels": 2,
+    },
+    "environment": {
+        "climate change": 3, "emissions": 2, "carbon": 2, "wildlife": 3, "pollution": 3, "deforestation": 3,
+        "heatwave*": 2, "biodiversity": 3, "conservation": 2, "climate": 2,
+    },
+    "entertainment": {
+        "box office": 3, "netflix": 2, "hollywood": 3, "album*": 3, "grammy*": 3, "oscar*": 3, "movie*": 2,
+        "film": 2, "tv series": 3, "celebrity": 3, "concert": 2, "concerts": 2, "trailer": 2, "actor": 2, "actress": 3,
+        "singer": 3, "box-office": 3,
+    },
+    "travel": {
+        "airline*": 3, "flights": 2, "airport*": 2, "tourism": 3, "tourists": 3, "cruise": 3, "passport*": 2,
+        "visas": 1, "visa-free": 2, "tourist visa": 3, "hotel*": 2, "holidaymakers": 3, "travel*": 2,
+    },
+    "education": {
+        "school*": 2, "university": 2, "universities": 2, "students": 2, "teachers": 3, "tuition": 3,
+        "curriculum": 3, "exam": 2, "exams": 2, "examination": 2, "examinations": 2, "campus": 2, "college*": 2,
+    },
+    "crime": {
+        "police": 2, "arrested": 2, "murder*": 3, "charged with": 3, "sentenced": 3, "stabbing": 3,
+        "robbery": 3, "fraud": 2, "suspect": 2, "homicide": 3, "jailed": 3, "prison": 2, "shooting": 2,
+    },
+    "global": {
+        "worldwide": 2, "globally": 2, "across the world": 2, "international": 1,
+    },
+}
+
+DEFAULT_MIN_SCORE = 4.0
+DEFAULT_MIN_MARGIN = 3.0
+RULES_PATH = os.getenv("AIDA_CATEGORY_RULES_PATH")
+
+
+def _phrase_pattern(phrase: str) -> str:
+    if phrase.endswith("*"):
+        return re.escape(phrase[:-1]) + r"[\w-]*"
+    return re.escape(phrase)
+
+
+class CategoryRuleIndex:
+    def __init__(self, rules: dict[str, dict[str, float]], min_score: float, min_margin: float):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self._exact: dict[str, tuple[str, float]] = {}
+        self._prefixes: list[tuple[str, str, float]] = []
+        alternatives = []
+        for label, phrases in rules.items():
+            for phrase, weight in phrases.items():
+                phrase = phrase.strip().lower()
+                if not phrase or not weight:
+                    continue
+                if phrase.endswith("*"):
+                    self._prefixes.append((phrase[:-1], label, float(weight)))
+                else:
+                    self._exact.setdefault(phrase, (label, float(weight)))
+                alternatives.append(_phrase_pattern(phrase))
+        # Longest first, so "stock market" wins over "stock*" at the same position.
+        alternatives.sort(key=len, reverse=True)
+        self._pattern = re.compile(r"(?<![\w-])(?:" + "|".join(alternatives) + r")(?![\w-])", re.IGNORECASE)
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def _lookup(self, matched: str) -> tuple[str, float] | None:
+        hit = self._exact.get(matched)
+        if hit:
+            return hit
+        for prefix, label, weight in self._prefixes:
+            if matched.startswith(prefix):
+                return label, weight
+        return None
+
+    def score(self, text: str) -> dict[str, float]:
+        scores: dict[str, float] = {}
+        for match in self._pattern.finditer(text or ""):
+            hit = self._lookup(match.group(0).lower())
+            if hit:
+                label, weight = hit
+                scores[label] = scores.get(label, 0.0) + weight
+        return scores
+
+    def decide(self, text: str) -> tuple[str | None, dict[str, float]]:
+        scores = self.score(text)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return None, scores
+        top_label, top_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if top_score >= self.min_score and top_score - runner_up >= self.min_margin:
+            return top_label, scores
+        return None, scores
+
+
+def _load_rules() -> CategoryRuleIndex:
+    # AIDA_CATEGORY_RULES_PATH may point to JSON like
+    # {"min_score": 4, "min_margin": 3, "labels": {"sports": {"nba": 3, "coach": 0}}};
+    # entries override the defaults per phrase, and a weight of 0 removes a phrase.
+    rules = {label: dict(phrases) for label, phrases in DEFAULT_RULES.items()}
+    min_score = DEFAULT_MIN_SCORE
+    min_margin = DEFAULT_MIN_MARGIN
+    if RULES_PATH:
+        try:
+            with open(RULES_PATH, "r", encoding="utf-8") as handle:
+                config = json.load(handle)
+            min_score = float(config.get("min_score", min_score))
+            min_margin = float(config.get("min_margin", min_margin))
+            for label, phrases in (config.get("labels") or {}).items():
+                rules.setdefault(label, {}).update(phrases)
+        except (OSError, ValueError, AttributeError) as exc:
+            print(f"Could not load category rules from {RULES_PATH}, using defaults: {exc}")
+    return CategoryRuleIndex(rules, min_score=min_score, min_margin=min_margin)
+
+
+_index = _load_rules()
+
+_stats_lock = threading.Lock()
+_stats = {"checked": 0, "decided": 0, "ambiguous": 0, "no_hits": 0, "decided_by_label": {}}
+
+
+def match_category_rules(text: str, labels: list[str]) -> str | None:
+    label, scores = _index.decide(text)
+    if label is not None and label not in labels:
+        label = None
+    with _stats_lock:
+        _stats["checked"] += 1
+        if label is not None:
+            _stats["decided"] += 1
+            _stats["decided_by_label"][label] = _stats["decided_by_label"].get(label, 0) + 1
+        elif scores:
+            _stats["ambiguous"] += 1
+        else:
+            _stats["no_hits"] += 1
+    return label
+
+
+def get_category_rule_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+        stats["decided_by_label"] = dict(sorted(_stats["decided_by_label"].items()))
+    checked = stats["checked"] or 1
+    stats["hit_rate"] = round(stats["decided"] / checked, 4) if stats["checked"] else None
+    stats["min_score"] = _index.min_score
+    stats["min_margin"] = _index.min_margin
+    return stats
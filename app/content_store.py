@@ -0,0 +1,59 @@
+# app/content_store.py - compressed storage for extracted article text
+
+import os
+import zlib
+from sqlalchemy.orm import Session
+from app.models import ArticleContent
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# "zstd" needs the optional zstandard package; without it everything is stored with zlib.
+CONTENT_CODEC = os.getenv("AIDA_CONTENT_CODEC", "zstd" if zstandard is not None else "zlib")
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 10
+
+
+def compress_text(text: str) -> tuple[str, bytes]:
+    raw = text.encode("utf-8")
+    if CONTENT_CODEC == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, _ZLIB_LEVEL)
+
+
+def decompress_text(codec: str, body: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Article text was stored with zstd; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown article content codec: {codec}")
+
+
+def build_content(text: str, meta: dict | None = None) -> ArticleContent | None:
+    if not text:
+        return None
+    meta = meta or {}
+    codec, body = compress_text(text)
+    return ArticleContent(
+        codec=codec,
+        body=body,
+        text_length=len(text),
+        compressed_length=len(body),
+        extractor=meta.get("extractor"),
+        source_url=meta.get("url"),
+        http_status=meta.get("http_status"),
+    )
+
+
+def content_text(content: ArticleContent | None) -> str | None:
+    if content is None:
+        return None
+    return decompress_text(content.codec, content.body)
+
+
+def load_article_text(db: Session, article_id: int) -> str | None:
+    return content_text(db.get(ArticleContent, article_id))
@@ -1,9 +1,9 @@
+import json
 import time
 import uuid
 import os
 import streamlit as st
 import requests
-import threading
 import html
 import re
 import sys
@@ -14,6 +14,7 @@ import altair as alt
 from datetime import datetime, timezone
 from sqlalchemy.exc import IntegrityError
 from zoneinfo import ZoneInfo
+from urllib.parse import urlencode
 
 _APP_DIR = Path(__file__).resolve().parent
 _ROOT_DIR = _APP_DIR.parent
@@ -23,12 +24,12 @@ for _path in (str(_ROOT_DIR), str(_APP_DIR)):
 
 try:
     from app.digest_summary import generate_digest_summary
-    from app.db import SessionLocal
+    from app.db import ReadSessionLocal, SessionLocal
     from app.models import UserStreak, UserRead
 except Exception:
     try:
         from digest_summary import generate_digest_summary
-        from db import SessionLocal
+        from db import ReadSessionLocal, SessionLocal
         from models import UserStreak, UserRead
     except Exception as exc:
         raise ImportError(f"Failed to import dashboard dependencies: {exc}") from exc
@@ -594,7 +595,7 @@ def _today_key(tz_name: str) -> str:
     return datetime.now(ZoneInfo(tz_name)).date().isoformat()
 
 def _get_read_urls(device_id: str, read_date: str) -> set[str]:
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         rows = (
             db.query(UserRead.article_url)
@@ -754,13 +755,51 @@ with goal_streak_container:
         unsafe_allow_html=True,
     )
 
+# Push fetch progress over the API's event stream; set AIDA_DASHBOARD_STATUS_STREAM=0 to poll instead.
+FETCH_STATUS_STREAM = os.getenv("AIDA_DASHBOARD_STATUS_STREAM", "1") != "0"
+FETCH_STATUS_POLL_S = 2.0
+FETCH_FINISHED_STATES = {"done", "error", "canceled"}
+
+def stream_fetch_status():
+    # Minimal Server-Sent Events reader: yields each event's JSON data; keep-alive comments are skipped.
+    with requests.get(f"{API_BASE}/fetch-status/stream", stream=True, timeout=(5, 60)) as response:
+        response.raise_for_status()
+        data_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                if line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+                continue
+            if data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+
+API_CACHE_ENTRIES = 16
+
+def _get_json(path: str, params=None, timeout: int = 15):
+    # Revalidates with the ETag from the last identical request; a 304 reuses the already parsed body.
+    cache = st.session_state.setdefault("api_cache", {})
+    key = f"{path}?{urlencode(params or [], doseq=True)}"
+    cached = cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = requests.get(f"{API_BASE}{path}", params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        cache.pop(key, None)
+        cache[key] = (etag, data)
+        while len(cache) > API_CACHE_ENTRIES:
+            cache.pop(next(iter(cache)))
+    return data
+
 last_fetch_time_display = "-"
 next_fetch_time_display = "-"
 last_fetch_raw = None
 try:
-    last_fetch_response = requests.get(f"{API_BASE}/last-fetch-time", timeout=10)
-    last_fetch_response.raise_for_status()
-    last_fetch_payload = last_fetch_response.json()
+    last_fetch_payload = _get_json("/last-fetch-time", timeout=10)
     last_fetch_raw = last_fetch_payload.get("last_fetch_time_utc")
     if last_fetch_raw:
         iso_text = last_fetch_raw.replace("Z", "+00:00")
@@ -810,48 +849,60 @@ if refresh_clicked:
     progress = st.progress(0.0)
     status.info("Starting fetch...")
 
-    def trigger_refresh():
-        try:
-            refresh_response = requests.post(f"{API_BASE}/refresh-news", timeout=300)
-            refresh_response.raise_for_status()
-        except requests.RequestException as exc:
-            status.error(f"Refresh failed: {exc}")
-
-    refresh_thread = threading.Thread(target=trigger_refresh, daemon=True)
-    refresh_thread.start()
-
-    start = time.perf_counter()
-    last_state = None
-    poll_interval_s = 2.0
-    while True:
-        try:
-            fetch_response = requests.get(f"{API_BASE}/fetch-status", timeout=5)
-            fetch_response.raise_for_status()
-            payload = fetch_response.json()
-        except requests.RequestException as exc:
-            log.warning(f"Status check failed: {exc}")
-            time.sleep(poll_interval_s)
-            continue
-
+    def show_fetch_status(payload):
         state = payload.get("state", "unknown")
-        message = payload.get("message", "")
         total = payload.get("total", 0) or 0
         processed = payload.get("processed", 0) or 0
         if total > 0:
             progress.progress(min(processed / total, 1.0))
         else:
             progress.progress(0.0)
-        log.info(message or f"Status: {state}")
-        last_state = state
-        if state in {"done", "error"}:
-            break
-        time.sleep(poll_interval_s)
+        detail = payload.get("message", "") or f"Status: {state}"
+        if state == "processing":
+            detail += f" · {payload.get('stored', 0)} new, {payload.get('errors', 0)} failed"
+        log.info(detail)
+        return state, payload.get("message", "")
+
+    def poll_fetch_status():
+        while True:
+            try:
+                fetch_response = requests.get(f"{API_BASE}/fetch-status", timeout=5)
+                fetch_response.raise_for_status()
+                yield fetch_response.json()
+            except requests.RequestException as exc:
+                log.warning(f"Status check failed: {exc}")
+            time.sleep(FETCH_STATUS_POLL_S)
+
+    start = time.perf_counter()
+    last_state = None
+    message = ""
+    try:
+        # /refresh-news only schedules the fetch, so the first status read already sees it.
+        refresh_response = requests.post(f"{API_BASE}/refresh-news", timeout=30)
+        refresh_response.raise_for_status()
+    except requests.RequestException as exc:
+        last_state, message = "error", f"Refresh failed: {exc}"
+    if last_state is None and FETCH_STATUS_STREAM:
+        try:
+            for payload in stream_fetch_status():
+                last_state, message = show_fetch_status(payload)
+                if last_state in FETCH_FINISHED_STATES:
+                    break
+        except (requests.RequestException, ValueError) as exc:
+            log.warning(f"Live status unavailable ({exc}); polling instead.")
+    if last_state not in FETCH_FINISHED_STATES:
+        for payload in poll_fetch_status():
+            last_state, message = show_fetch_status(payload)
+            if last_state in FETCH_FINISHED_STATES:
+                break
 
     elapsed = time.perf_counter() - start
     if last_state == "done":
         status.success(f"Latest news fetched in {elapsed:.1f}s.")
     elif last_state == "error":
         status.error(message or f"Refresh failed after {elapsed:.1f}s.")
+    elif last_state == "canceled":
+        status.warning(message or "Fetch canceled.")
     else:
         status.success(f"Fetch completed in {elapsed:.1f}s.")
 
@@ -861,10 +912,33 @@ if refresh_clicked:
         else:
             st.experimental_rerun()
 
+FILTER_PARAMS = {
+    "filter_category": "category",
+    "filter_country": "country",
+    "filter_source": "source",
+    "filter_impact": "impact_level",
+    "filter_date": "date",
+}
+
+def _summaries_params(tz_name: str) -> list[tuple[str, str]]:
+    # Widget values from the previous run are already in session_state, so the API filters before anything is sent.
+    params = [("tz", tz_name)]
+    for key, param in FILTER_PARAMS.items():
+        for value in st.session_state.get(key) or []:
+            params.append((param, value))
+    keyword = (st.session_state.get("filter_keyword") or "").strip()
+    if keyword:
+        params.append(("q", keyword))
+    return params
+
 try:
-    response = requests.get(f"{API_BASE}/summaries", timeout=15)
-    response.raise_for_status()
-    data = response.json()
+    facets = _get_json("/facets", params={"tz": selected_timezone})
+except requests.RequestException as exc:
+    st.error(f"Failed to load filters: {exc}")
+    facets = {}
+
+try:
+    data = _get_json("/summaries", params=_summaries_params(selected_timezone))
 except requests.RequestException as exc:
     st.error(f"Failed to load summaries: {exc}")
     data = []
@@ -873,25 +947,14 @@ if not isinstance(data, list):
     st.error("Unexpected response from server.")
     data = []
 
-categories = sorted({item.get("category", "") for item in data if item.get("category")})
-sources = sorted({item.get("source", "") for item in data if item.get("source")})
-countries = sorted({item.get("country", "") for item in data if item.get("country")})
+categories = sorted(facets.get("category") or {})
+sources = sorted(facets.get("source") or {})
+countries = sorted(facets.get("country") or {})
 impact_levels = sorted(
-    {
-        normalize_impact_level(item.get("impact_level", ""))
-        for item in data
-        if item.get("impact_level")
-    },
+    facets.get("impact_level") or {},
     key=lambda level: {"critical": 0, "important": 1, "routine": 2}.get(level, 99),
 )
-dates = sorted(
-    {
-        published_date_key(item.get("published_at"), selected_timezone)
-        for item in data
-        if item.get("published_at")
-    }
-)
-dates = [d for d in dates if d]
+dates = sorted(facets.get("date") or {})
 
 def _sync_multiselect(key: str, options: list[str]) -> None:
     current = st.session_state.get(key, [])
@@ -910,13 +973,14 @@ filter_header = st.columns([5, 1])
 with filter_header[0]:
     st.markdown('<div class="aida-section-title">Filters</div>', unsafe_allow_html=True)
     st.markdown('<div class="aida-section-hint">Refine the feed with topic, source, or keyword.</div>', unsafe_allow_html=True)
+def _clear_filters() -> None:
+    # Runs before the rerun, so the next /summaries request is already unfiltered.
+    for key in FILTER_PARAMS:
+        st.session_state[key] = []
+    st.session_state["filter_keyword"] = ""
+
 with filter_header[1]:
-    if st.button("Clear all", use_container_width=True):
-        st.session_state["filter_category"] = []
-        st.session_state["filter_country"] = []
-        st.session_state["filter_impact"] = []
-        st.session_state["filter_date"] = []
-        st.session_state["filter_source"] = []
+    st.button("Clear all", use_container_width=True, on_click=_clear_filters)
 
 def sentiment_bucket(value: str) -> str:
     if not value:
@@ -982,42 +1046,9 @@ with filter_row2[2]:
     keyword = st.text_input(
         "Search",
         placeholder="Search title or summary",
+        key="filter_keyword",
     )
 
-if category:
-    data = [item for item in data if item.get("category") in category]
-
-if country:
-    data = [item for item in data if item.get("country") in country]
-
-if source:
-    data = [item for item in data if item.get("source") in source]
-
-if impact_level_filter:
-    selected_levels = {level.lower() for level in impact_level_filter}
-    data = [
-        item
-        for item in data
-        if normalize_impact_level(item.get("impact_level") or "") in selected_levels
-    ]
-
-if date_filter:
-    data = [
-        item
-        for item in data
-        if published_date_key(item.get("published_at"), selected_timezone) in date_filter
-    ]
-
-if keyword:
-    needle = keyword.strip().lower()
-    if needle:
-        data = [
-            item
-            for item in data
-            if needle in (item.get("title") or "").lower()
-            or needle in (item.get("summary") or "").lower()
-        ]
-
 highlight_term = keyword.strip() if keyword else ""
 
 data = [item for item in data if (item.get("summary") or "").strip()]
@@ -1,25 +1,63 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+import os
+import threading
 try:
     from app.models import Base
+    from app.migrations import run_migrations
 except ModuleNotFoundError:
     from models import Base
+    from migrations import run_migrations
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./aida.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+# AIDA_DB_PERF_MODE=1 switches SQLite to WAL journaling with tuned pragmas, and splits
+# connections into one writer plus a pool of query_only readers, so a running fetch
+# no longer blocks /summaries or the dashboard.
+DB_PERF_MODE = os.getenv("AIDA_DB_PERF_MODE") == "1"
+DB_MMAP_BYTES = int(os.getenv("AIDA_DB_MMAP_BYTES", str(256 * 1024 * 1024)))
+DB_CACHE_KB = int(os.getenv("AIDA_DB_CACHE_KB", "65536"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("AIDA_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_READ_POOL_SIZE = int(os.getenv("AIDA_DB_READ_POOL_SIZE", "8"))
+
+
+def apply_perf_pragmas(engine, read_only: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={DB_MMAP_BYTES}")
+        # Negative cache_size is in KiB rather than pages.
+        cursor.execute(f"PRAGMA cache_size=-{DB_CACHE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def create_engines(url: str = SQLALCHEMY_DATABASE_URL, perf_mode: bool = DB_PERF_MODE):
+    # Returns (writer, reader). Outside perf mode both are the same default engine.
+    connect_args = {"check_same_thread": False}
+    if not perf_mode or not url.startswith("sqlite"):
+        writer = create_engine(url, connect_args=connect_args)
+        return writer, writer
+    # SQLite allows one writer at a time; queueing writers in the pool is cheaper than busy-waiting.
+    writer = create_engine(url, connect_args=connect_args, pool_size=1, max_overflow=0, pool_timeout=60)
+    reader = create_engine(url, connect_args=connect_args, pool_size=DB_READ_POOL_SIZE, max_overflow=DB_READ_POOL_SIZE)
+    apply_perf_pragmas(writer, read_only=False)
+    apply_perf_pragmas(reader, read_only=True)
+    return writer, reader
+
+
+# Long-running writers (a fetch, each backfill chunk, a retention run) take this lock, so they
+# queue behind one another instead of waiting out pool_timeout on the single perf-mode writer.
+writer_job_lock = threading.Lock()
+
+engine, read_engine = create_engines()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base.metadata.create_all(bind=engine)
-
-def _ensure_sqlite_column(table: str, column: str, column_type: str) -> None:
-    if engine.url.get_backend_name() != "sqlite":
-        return
-    with engine.begin() as conn:
-        rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
-        existing = {row[1] for row in rows}
-        if column not in existing:
-            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
-
-_ensure_sqlite_column("articles", "impact_level", "TEXT")
-_ensure_sqlite_column("articles", "impact_reason", "TEXT")
-_ensure_sqlite_column("articles", "image_url", "TEXT")
+run_migrations(engine)
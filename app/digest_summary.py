@@ -1,12 +1,22 @@
-from groq import Groq
-import os
 import json
 import hashlib
 import re
 import time
-
-GROQ_SENTIMENT_API_KEY = os.getenv("GROQ_SENTIMENT_API_KEY") or os.getenv("GROQ_API_KEY")
-_groq_client = Groq(api_key=GROQ_SENTIMENT_API_KEY) if GROQ_SENTIMENT_API_KEY else None
+try:
+    from app.groq_pool import GroqKeyPool, get_key_pool, groq_keys_from_env
+    from app.llm_circuit import check_llm_circuit, record_llm_failure, record_llm_success
+except ModuleNotFoundError:
+    from groq_pool import GroqKeyPool, get_key_pool, groq_keys_from_env
+    from llm_circuit import check_llm_circuit, record_llm_failure, record_llm_success
+
+# Shares the sentiment keys, so it also shares their per-key budgets.
+_GROQ_KEY_RPM = 30
+_GROQ_KEY_TPM = 6000
+_GROQ_KEY_RPD = 14400
+GROQ_SENTIMENT_API_KEYS = groq_keys_from_env("GROQ_SENTIMENT_API_KEY") or groq_keys_from_env("GROQ_API_KEY")
+_groq_pool = get_key_pool(
+    "sentiment", GROQ_SENTIMENT_API_KEYS, rpm=_GROQ_KEY_RPM, tpm=_GROQ_KEY_TPM, rpd=_GROQ_KEY_RPD
+)
 
 _digest_cache: dict[str, str] = {}
 
@@ -66,11 +76,12 @@ def _is_tpm_rate_limit(exc: Exception) -> bool:
         return True
     return False
 
-def _call_groq_with_retry(client: Groq, **kwargs):
+def _call_groq_with_retry(pool: GroqKeyPool, **kwargs):
+    check_llm_circuit("Digest summary")
     total_attempts = max(_MAX_RETRIES, 1)
     for attempt in range(total_attempts):
         try:
-            return client.chat.completions.create(**kwargs)
+            response = pool.create(**kwargs)
         except Exception as exc:
             message = str(exc)
             is_rate_limit = "rate limit" in message.lower() or "429" in message
@@ -96,7 +107,10 @@ def _call_groq_with_retry(client: Groq, **kwargs):
                     print("Digest summary rate limited (TPM). Retries exhausted.")
                 else:
                     print("Digest summary rate limited (RPD). Skipping retry.")
+            record_llm_failure(exc)
             raise
+        record_llm_success()
+        return response
 
 def _digest_cache_key(items: list[dict], last_fetch_raw: str | None) -> str:
     parts = [last_fetch_raw or ""]
@@ -110,7 +124,7 @@ def _digest_cache_key(items: list[dict], last_fetch_raw: str | None) -> str:
     return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 def generate_digest_summary(items: list[dict], last_fetch_raw: str | None) -> str | None:
-    if not items or not _groq_client:
+    if not items or not _groq_pool:
         return None
 
     key = _digest_cache_key(items, last_fetch_raw)
@@ -141,7 +155,7 @@ def generate_digest_summary(items: list[dict], last_fetch_raw: str | None) -> st
 
     try:
         response = _call_groq_with_retry(
-            _groq_client,
+            _groq_pool,
             model="llama-3.1-8b-instant",
             messages=[{"role": "user", "content": json.dumps(prompt)}],
             temperature=0.3,
@@ -0,0 +1,123 @@
+# app/filters.py - SQL filters shared by the article list endpoints
+
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import Integer, and_, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.article_fields import impact_rank
+from app.models import Article
+from app.search import has_search_words, keyword_clause
+
+# Every real UTC offset is a multiple of 15 minutes, so 15-minute buckets map to exactly one local date.
+_DATE_BUCKET_MINUTES = 15
+
+
+class InvalidFilterError(ValueError):
+    pass
+
+
+def _values(values) -> list[str]:
+    # Accepts repeated query params and comma-separated lists alike.
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [part.strip() for value in values for part in value.split(",") if part.strip()]
+
+
+def resolve_timezone(tz_name: str | None):
+    if not tz_name:
+        return timezone.utc
+    try:
+        return ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise InvalidFilterError(f"Unknown timezone: {tz_name}") from exc
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    # published_at is stored as naive UTC.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_date_ranges(dates: list[str], tz_name: str | None) -> list[tuple[datetime, datetime]]:
+    # Each local calendar day becomes a naive-UTC [start, end) range on published_at.
+    tz = resolve_timezone(tz_name)
+    ranges = []
+    for value in sorted(set(dates)):
+        try:
+            day = date.fromisoformat(value)
+        except ValueError as exc:
+            raise InvalidFilterError(f"Dates must be YYYY-MM-DD, got {value!r}") from exc
+        start = datetime.combine(day, time.min, tzinfo=tz)
+        end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+        ranges.append((to_naive_utc(start), to_naive_utc(end)))
+    return ranges
+
+
+def filter_articles(
+    query,
+    sentiment_contextual=None,
+    sentiment_emotional=None,
+    category=None,
+    source=None,
+    country=None,
+    impact_level=None,
+    min_confidence: float | None = None,
+    dates=None,
+    tz: str | None = None,
+    published_after: datetime | None = None,
+    published_before: datetime | None = None,
+    keyword: str | None = None,
+    fts: bool = True,
+):
+    # Works on a select() or a legacy Query alike; fts says whether the articles_fts index exists.
+    # Multi-valued filters are ORed within a field and ANDed across fields; each one is an indexed column.
+    for column, values in (
+        (Article.sentiment_contextual, sentiment_contextual),
+        (Article.sentiment_emotional, sentiment_emotional),
+        (Article.category, category),
+        (Article.source, source),
+    ):
+        values = _values(values)
+        if values:
+            query = query.filter(column.in_(values))
+    countries = _values(country)
+    if countries:
+        query = query.filter(Article.country.in_([code.upper() for code in countries]))
+    levels = _values(impact_level)
+    if levels:
+        ranks = {impact_rank(level) for level in levels}
+        if None in ranks:
+            raise InvalidFilterError("impact_level must be critical, important or routine.")
+        query = query.filter(Article.impact_rank.in_(sorted(ranks)))
+    if min_confidence is not None:
+        query = query.filter(Article.confidence_score >= min_confidence)
+    ranges = local_date_ranges(_values(dates), tz)
+    if ranges:
+        query = query.filter(
+            or_(*(and_(Article.published_at >= start, Article.published_at < end) for start, end in ranges))
+        )
+    if published_after:
+        query = query.filter(Article.published_at >= to_naive_utc(published_after))
+    if published_before:
+        query = query.filter(Article.published_at < to_naive_utc(published_before))
+    # A keyword of only punctuation ("-", "$") has nothing to match on, so it filters nothing.
+    if has_search_words(keyword):
+        query = query.filter(keyword_clause(keyword, fts))
+    return query
+
+
+async def published_date_counts(db: AsyncSession, tz_name: str | None) -> dict[str, int]:
+    # Article counts per local calendar day, grouped in SQL into 15-minute UTC buckets.
+    tz = resolve_timezone(tz_name)
+    minute = cast(func.strftime("%M", Article.published_at), Integer) // _DATE_BUCKET_MINUTES * _DATE_BUCKET_MINUTES
+    bucket = func.strftime("%Y-%m-%d %H:", Article.published_at).concat(func.printf("%02d", minute))
+    statement = select(bucket, func.count()).where(Article.published_at.isnot(None)).group_by(bucket)
+    counts = {}
+    for value, count in (await db.execute(statement)).all():
+        start = datetime.strptime(value, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+        day = start.astimezone(tz).strftime("%Y-%m-%d")
+        counts[day] = counts.get(day, 0) + count
+    return dict(sorted(counts.items(), reverse=True))
@@ -0,0 +1,250 @@
+# app/groq_pool.py - per-purpose pools of Groq API keys with per-key RPM/TPM/RPD budgets
+
+from groq import Groq
+from collections import deque
+import os
+import threading
+import time
+try:
+    from app.llm_circuit import LLMPoolDrainedError, is_daily_limit_error, is_rate_limit_error, retry_hint_s
+    from app.metrics import LLM_RATE_LIMITED, LLM_REQUEST_SECONDS
+except ModuleNotFoundError:
+    from llm_circuit import LLMPoolDrainedError, is_daily_limit_error, is_rate_limit_error, retry_hint_s
+    from metrics import LLM_RATE_LIMITED, LLM_REQUEST_SECONDS
+
+_MINUTE_S = 60.0
+_DAY_S = 24 * 60 * 60.0
+_DEFAULT_COOLDOWN_S = 2.0
+_DEFAULT_DRAIN_S = 60 * 60.0
+_CHARS_PER_TOKEN = 4
+
+
+class GroqKeysExhaustedError(RuntimeError):
+    pass
+
+
+class GroqKeysDrainedError(GroqKeysExhaustedError, LLMPoolDrainedError):
+    pass
+
+
+def groq_keys_from_env(*names: str) -> list[str]:
+    # Each NAME may hold one key, and NAMEs (plural) may hold a comma-separated list.
+    keys = []
+    for name in names:
+        for value in (os.getenv(f"{name}S"), os.getenv(name)):
+            for key in (value or "").split(","):
+                key = key.strip()
+                if key and key not in keys:
+                    keys.append(key)
+    return keys
+
+
+def _estimate_tokens(kwargs: dict) -> int:
+    prompt_chars = sum(len(str(message.get("content") or "")) for message in kwargs.get("messages") or [])
+    return prompt_chars // _CHARS_PER_TOKEN + int(kwargs.get("max_tokens") or 0)
+
+
+class _PooledKey:
+    def __init__(self, index: int, api_key: str):
+        self.label = f"key{index}:...{api_key[-4:]}"
+        self.client = Groq(api_key=api_key)
+        self.minute_requests = deque()
+        self.minute_tokens = deque()
+        self.day_requests = deque()
+        self.cooling_until = 0.0
+        self.drained_until = 0.0
+        self.requests = 0
+        self.tokens = 0
+        self.rate_limited = 0
+
+    def prune(self, now: float) -> None:
+        while self.minute_requests and now - self.minute_requests[0] >= _MINUTE_S:
+            self.minute_requests.popleft()
+        while self.minute_tokens and now - self.minute_tokens[0][0] >= _MINUTE_S:
+            self.minute_tokens.popleft()
+        while self.day_requests and now - self.day_requests[0] >= _DAY_S:
+            self.day_requests.popleft()
+
+    def minute_token_count(self) -> int:
+        return sum(tokens for _, tokens in self.minute_tokens)
+
+    def minute_reset_s(self, now: float) -> float:
+        # Seconds until the oldest request in the minute window ages out.
+        stamps = []
+        if self.minute_requests:
+            stamps.append(self.minute_requests[0])
+        if self.minute_tokens:
+            stamps.append(self.minute_tokens[0][0])
+        return min(stamps, default=now) + _MINUTE_S - now
+
+
+class GroqKeyPool:
+    def __init__(self, purpose: str, api_keys: list[str], rpm: int, tpm: int, rpd: int):
+        self.purpose = purpose
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rpd = rpd
+        self._keys = [_PooledKey(index, key) for index, key in enumerate(api_keys, start=1)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _headroom(self, key: _PooledKey, estimate: int) -> float:
+        return min(
+            1.0 - (len(key.minute_requests) + 1) / self.rpm,
+            1.0 - (key.minute_token_count() + estimate) / self.tpm,
+            1.0 - (len(key.day_requests) + 1) / self.rpd,
+        )
+
+    def _has_minute_budget(self, key: _PooledKey, estimate: int) -> bool:
+        # A request larger than the whole TPM budget still goes to an idle key.
+        if len(key.minute_requests) >= self.rpm:
+            return False
+        return not key.minute_tokens or key.minute_token_count() + estimate <= self.tpm
+
+    def _acquire(self, estimate: int, tried: set[str]) -> tuple[_PooledKey, list] | None:
+        now = time.monotonic()
+        with self._lock:
+            best = None
+            best_score = None
+            for key in self._keys:
+                if key.label in tried or key.drained_until > now:
+                    continue
+                key.prune(now)
+                if len(key.day_requests) >= self.rpd:
+                    # Out of daily budget: drained until its oldest request of the day ages out.
+                    key.drained_until = key.day_requests[0] + _DAY_S
+                    print(f"Groq {self.purpose} {key.label} drained (RPD budget used) for {key.drained_until - now:.0f}s.")
+                    continue
+                if not self._has_minute_budget(key, estimate):
+                    continue
+                # Keys cooling down after a TPM 429 rank below every key with live headroom.
+                score = self._headroom(key, estimate) - (2.0 if key.cooling_until > now else 0.0)
+                if best_score is None or score > best_score:
+                    best, best_score = key, score
+            if best is None:
+                return None
+            entry = [now, estimate]
+            best.minute_requests.append(now)
+            best.minute_tokens.append(entry)
+            best.day_requests.append(now)
+            best.requests += 1
+            best.tokens += estimate
+            return best, entry
+
+    def _settle(self, key: _PooledKey, entry: list, response) -> None:
+        usage = getattr(response, "usage", None)
+        actual = getattr(usage, "total_tokens", None)
+        if not isinstance(actual, int):
+            return
+        with self._lock:
+            key.tokens += actual - entry[1]
+            entry[1] = actual
+
+    def _mark_rate_limited(self, key: _PooledKey, exc: Exception) -> None:
+        hint = retry_hint_s(exc)
+        now = time.monotonic()
+        LLM_RATE_LIMITED.inc(purpose=self.purpose, limit="rpd" if is_daily_limit_error(exc) else "tpm")
+        with self._lock:
+            key.rate_limited += 1
+            if is_daily_limit_error(exc):
+                key.drained_until = now + (hint or _DEFAULT_DRAIN_S)
+                print(f"Groq {self.purpose} {key.label} drained (RPD) for {(hint or _DEFAULT_DRAIN_S):.0f}s.")
+            else:
+                key.cooling_until = now + (hint or _DEFAULT_COOLDOWN_S)
+
+    def _exhausted_error(self) -> GroqKeysExhaustedError:
+        now = time.monotonic()
+        with self._lock:
+            live = [key for key in self._keys if key.drained_until <= now]
+            if live:
+                wait_s = min(key.minute_reset_s(now) for key in live)
+            else:
+                wait_s = min((key.drained_until - now for key in self._keys), default=_DEFAULT_DRAIN_S)
+        if live:
+            # Worded as a per-minute limit so callers keep their TPM retry/backoff, not the RPD circuit.
+            return GroqKeysExhaustedError(
+                f"Groq rate limit: all {self.purpose} keys used their per-minute budget (RPM/TPM). "
+                f"Please try again in {max(wait_s, 1.0):.1f}s."
+            )
+        return GroqKeysDrainedError(
+            f"Groq rate limit: all {self.purpose} keys drained on requests per day (RPD). "
+            f"Please try again in {max(wait_s, 1.0):.1f}s."
+        )
+
+    def create(self, **kwargs):
+        # One pass over the pool: rate-limited keys hand the request to the next-best key,
+        # and the last rate-limit error surfaces so callers keep their TPM retry/backoff.
+        estimate = _estimate_tokens(kwargs)
+        tried = set()
+        last_exc = None
+        while True:
+            acquired = self._acquire(estimate, tried)
+            if acquired is None:
+                exhausted = self._exhausted_error()
+                # A pool that is drained for the day reports that, not the last key's raw 429.
+                if last_exc is not None and not isinstance(exhausted, GroqKeysDrainedError):
+                    raise last_exc
+                raise exhausted from last_exc
+            key, entry = acquired
+            tried.add(key.label)
+            started = time.perf_counter()
+            try:
+                response = key.client.chat.completions.create(**kwargs)
+            except Exception as exc:
+                rate_limited = is_rate_limit_error(exc)
+                outcome = "rate_limited" if rate_limited else "error"
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, purpose=self.purpose, outcome=outcome)
+                if not rate_limited:
+                    raise
+                self._mark_rate_limited(key, exc)
+                last_exc = exc
+                continue
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, purpose=self.purpose, outcome="ok")
+            self._settle(key, entry, response)
+            return response
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        keys = []
+        with self._lock:
+            for key in self._keys:
+                key.prune(now)
+                keys.append(
+                    {
+                        "key": key.label,
+                        "state": (
+                            "drained" if key.drained_until > now
+                            else "cooling" if key.cooling_until > now
+                            else "active"
+                        ),
+                        "rpm_used": len(key.minute_requests),
+                        "tpm_used": key.minute_token_count(),
+                        "rpd_used": len(key.day_requests),
+                        "requests": key.requests,
+                        "tokens": key.tokens,
+                        "rate_limited": key.rate_limited,
+                    }
+                )
+        return {"purpose": self.purpose, "rpm": self.rpm, "tpm": self.tpm, "rpd": self.rpd, "keys": keys}
+
+
+_pools_lock = threading.Lock()
+_pools: dict[str, GroqKeyPool] = {}
+
+
+def get_key_pool(purpose: str, api_keys: list[str], rpm: int, tpm: int, rpd: int) -> GroqKeyPool:
+    # Modules that share a purpose (sentiment and the digest) share one budget.
+    with _pools_lock:
+        pool = _pools.get(purpose)
+        if pool is None:
+            pool = GroqKeyPool(purpose, api_keys, rpm=rpm, tpm=tpm, rpd=rpd)
+            _pools[purpose] = pool
+        return pool
+
+
+def get_key_pool_status() -> list[dict]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.status() for pool in pools if len(pool)]
@@ -0,0 +1,139 @@
+# app/hedging.py - race slow LLM calls against the local model once they pass the observed p90
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+_DEFAULT_THRESHOLD_S = 8.0
+_MIN_THRESHOLD_S = 1.0
+_MIN_SAMPLES = 20
+_LATENCY_WINDOW = 200
+_THRESHOLD_PERCENTILE = 0.9
+
+# Two slots per fetch worker: the LLM call and, when it runs long, the local hedge.
+_hedge_pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="aida-hedge")
+
+_stats_lock = threading.Lock()
+_latencies: dict[str, deque] = {}
+_stats: dict[str, dict] = {}
+
+
+class HedgeCancelledError(RuntimeError):
+    pass
+
+
+def _stage_stats(stage: str) -> dict:
+    # Caller holds _stats_lock.
+    if stage not in _stats:
+        _stats[stage] = {
+            "calls": 0,
+            "hedged": 0,
+            "primary_wins": 0,
+            "hedge_wins": 0,
+            "no_result": 0,
+        }
+        _latencies[stage] = deque(maxlen=_LATENCY_WINDOW)
+    return _stats[stage]
+
+
+def _record_latency(stage: str, seconds: float) -> None:
+    with _stats_lock:
+        _stage_stats(stage)
+        _latencies[stage].append(seconds)
+
+
+def hedge_threshold_s(stage: str) -> float:
+    with _stats_lock:
+        _stage_stats(stage)
+        samples = sorted(_latencies[stage])
+    if len(samples) < _MIN_SAMPLES:
+        return _DEFAULT_THRESHOLD_S
+    index = min(int(len(samples) * _THRESHOLD_PERCENTILE), len(samples) - 1)
+    return max(samples[index], _MIN_THRESHOLD_S)
+
+
+def _acceptable(future) -> object | None:
+    if future.cancelled():
+        return None
+    try:
+        result = future.result()
+    except Exception as exc:
+        print(f"Hedged call failed: {exc}")
+        return None
+    if isinstance(result, str) and not result.strip():
+        return None
+    return result
+
+
+def _unless_cancelled(call, cancel_event: threading.Event):
+    # Future.cancel() only stops calls still queued in the pool, so each side checks its event
+    # before it starts inference. A model call already running cannot be interrupted; it runs
+    # to completion and its result is dropped.
+    if cancel_event.is_set():
+        raise HedgeCancelledError("Hedged call skipped: the other side already won.")
+    return call(cancel_event)
+
+
+def run_hedged(stage: str, primary, hedge, threshold_s: float | None = None):
+    # primary/hedge take a threading.Event that is set when the other side wins; they should
+    # check it between steps (e.g. before each retry).
+    # Returns (result, winner) with winner in {"primary", "hedge", None}.
+    if threshold_s is None:
+        threshold_s = hedge_threshold_s(stage)
+    primary_cancel = threading.Event()
+    hedge_cancel = threading.Event()
+    started = time.perf_counter()
+
+    def _timed_primary():
+        result = _unless_cancelled(primary, primary_cancel)
+        if result:
+            _record_latency(stage, time.perf_counter() - started)
+        return result
+
+    with _stats_lock:
+        _stage_stats(stage)["calls"] += 1
+    primary_future = _hedge_pool.submit(_timed_primary)
+    done, _ = wait([primary_future], timeout=threshold_s)
+    if done:
+        result = _acceptable(primary_future)
+        if result is None:
+            with _stats_lock:
+                _stage_stats(stage)["no_result"] += 1
+            return None, None
+        with _stats_lock:
+            _stage_stats(stage)["primary_wins"] += 1
+        return result, "primary"
+
+    print(f"Hedging {stage}: LLM call exceeded {threshold_s:.2f}s, starting local engine.")
+    with _stats_lock:
+        _stage_stats(stage)["hedged"] += 1
+    hedge_future = _hedge_pool.submit(_unless_cancelled, hedge, hedge_cancel)
+    pending = {primary_future: "primary", hedge_future: "hedge"}
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            winner = pending.pop(future)
+            result = _acceptable(future)
+            if result is None:
+                continue
+            for loser, loser_cancel in ((primary_future, primary_cancel), (hedge_future, hedge_cancel)):
+                if loser is not future:
+                    loser_cancel.set()
+                    loser.cancel()
+            with _stats_lock:
+                _stage_stats(stage)[f"{winner}_wins"] += 1
+            return result, winner
+    with _stats_lock:
+        _stage_stats(stage)["no_result"] += 1
+    return None, None
+
+
+def get_hedge_stats() -> dict:
+    with _stats_lock:
+        stages = {stage: dict(stats) for stage, stats in _stats.items()}
+    for stage, stats in stages.items():
+        calls = stats["calls"] or 1
+        stats["hedge_rate"] = round(stats["hedged"] / calls, 4)
+        stats["threshold_s"] = round(hedge_threshold_s(stage), 3)
+    return stages
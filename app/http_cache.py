@@ -0,0 +1,89 @@
+# app/http_cache.py - ETag / Last-Modified validators tied to the articles data version
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.metrics import record_cache_lookup
+
+# Responses at least this large are compressed when the client accepts it.
+COMPRESS_MIN_BYTES = int(os.getenv("AIDA_COMPRESS_MIN_BYTES", "1024"))
+# Clients may keep a copy but must revalidate it; a matching ETag costs one indexed row read.
+CACHE_CONTROL = "no-cache"
+
+
+async def get_data_version(db: AsyncSession) -> tuple[int, datetime | None]:
+    # Bumped by triggers on every articles insert/update/delete (migration 6).
+    row = (await db.execute(text("SELECT version, changed_at FROM data_version WHERE id = 1"))).first()
+    if row is None:
+        return 0, None
+    changed_at = datetime.strptime(row.changed_at, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
+    return row.version, changed_at
+
+
+async def validators(db: AsyncSession, *extra) -> dict:
+    # extra: anything else the representation depends on that is not an article write.
+    version, changed_at = await get_data_version(db)
+    tag = str(version)
+    if extra:
+        tag += "-" + hashlib.sha1(repr(extra).encode("utf-8")).hexdigest()[:12]
+    # Weak: the same data may be sent gzip-, brotli- or un-compressed.
+    headers = {"ETag": f'W/"{tag}"', "Cache-Control": CACHE_CONTROL}
+    if changed_at is not None:
+        headers["Last-Modified"] = format_datetime(changed_at, usegmt=True)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    # Counted as lookups of the client's cache: a 304 is a hit, a conditional request that gets a body is a miss.
+    not_modified = _is_not_modified(request, headers)
+    if not_modified is not None:
+        record_cache_lookup("http_conditional", not_modified)
+    return bool(not_modified)
+
+
+def _is_not_modified(request: Request, headers: dict) -> bool | None:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+        return _etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if not if_modified_since:
+        return None
+    if not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+class CompressionMiddleware:
+    # Wraps the gzip/brotli middleware and bypasses it for streams that must reach the client
+    # event by event (Server-Sent Events); a compressor would hold small chunks in its buffer.
+
+    def __init__(self, app, compressor, minimum_size: int, uncompressed_paths=()):
+        self.app = app
+        self.compressed_app = compressor(app, minimum_size=minimum_size)
+        self.uncompressed_paths = frozenset(uncompressed_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.uncompressed_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed_app(scope, receive, send)
@@ -0,0 +1,171 @@
+# app/llm_circuit.py - shared circuit breaker for Groq calls across all LLM modules
+
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+_FAILURE_THRESHOLD = 5
+_COOLDOWN_S = 120.0
+_RPD_COOLDOWN_S = 30 * 60.0
+_MAX_COOLDOWN_S = 6 * 60 * 60.0
+
+_TRY_AGAIN_RE = re.compile(r"try again in ((?:[0-9.]+(?:ms|h|m|s))+)", re.IGNORECASE)
+_DURATION_PART_RE = re.compile(r"([0-9.]+)(ms|h|m|s)", re.IGNORECASE)
+_DURATION_UNITS_S = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class LLMCircuitOpenError(RuntimeError):
+    pass
+
+
+class LLMPoolDrainedError(RuntimeError):
+    # Every key of one purpose's pool is out of daily quota. The other purposes' pools may still
+    # have quota, so this never trips the shared circuit.
+    pass
+
+
+_circuit_lock = threading.Lock()
+_circuit = {
+    "state": "closed",
+    "reason": "",
+    "consecutive_failures": 0,
+    "cooldown_s": 0.0,
+    "open_until": 0.0,
+    "probe_in_flight": False,
+    "opened_at_utc": None,
+    "retry_at_utc": None,
+    "trips": 0,
+    "rejected": 0,
+}
+
+
+def _now_utc_iso(offset_s: float = 0.0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset_s)).isoformat()
+
+
+def is_daily_limit_error(exc: Exception) -> bool:
+    message = str(exc).lower()
+    return "requests per day" in message or "rpd" in message or "tokens per day" in message
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    message = str(exc)
+    return "rate limit" in message.lower() or "429" in message
+
+
+def retry_hint_s(exc: Exception) -> float | None:
+    match = _TRY_AGAIN_RE.search(str(exc) or "")
+    if not match:
+        return None
+    total = 0.0
+    for value, unit in _DURATION_PART_RE.findall(match.group(1)):
+        try:
+            total += float(value) * _DURATION_UNITS_S[unit.lower()]
+        except ValueError:
+            return None
+    return total or None
+
+
+def _open_circuit(reason: str, cooldown_s: float) -> None:
+    # Caller holds _circuit_lock.
+    cooldown_s = min(max(cooldown_s, 1.0), _MAX_COOLDOWN_S)
+    _circuit.update(
+        state="open",
+        reason=reason,
+        cooldown_s=cooldown_s,
+        open_until=time.monotonic() + cooldown_s,
+        probe_in_flight=False,
+        opened_at_utc=_now_utc_iso(),
+        retry_at_utc=_now_utc_iso(cooldown_s),
+        trips=_circuit["trips"] + 1,
+    )
+    print(f"LLM circuit opened for {cooldown_s:.0f}s: {reason}")
+
+
+def _admit_llm_request() -> str | None:
+    with _circuit_lock:
+        state = _circuit["state"]
+        if state == "closed":
+            return "request"
+        if state == "open" and time.monotonic() >= _circuit["open_until"]:
+            _circuit.update(state="half_open", probe_in_flight=True)
+            print("LLM circuit half-open: sending probe request.")
+            return "probe"
+        if state == "half_open" and not _circuit["probe_in_flight"]:
+            _circuit["probe_in_flight"] = True
+            return "probe"
+        _circuit["rejected"] += 1
+        return None
+
+
+def allow_llm_request() -> bool:
+    return _admit_llm_request() is not None
+
+
+def check_llm_circuit(label: str) -> bool:
+    # Returns True when this request is the half-open probe.
+    admission = _admit_llm_request()
+    if admission is None:
+        with _circuit_lock:
+            retry_at = _circuit["retry_at_utc"]
+        raise LLMCircuitOpenError(f"{label} skipped: LLM circuit open until {retry_at}.")
+    return admission == "probe"
+
+
+def release_llm_probe() -> None:
+    # A probe abandoned before it got an answer lets the next caller probe instead.
+    with _circuit_lock:
+        if _circuit["state"] == "half_open":
+            _circuit["probe_in_flight"] = False
+
+
+def record_llm_success() -> None:
+    with _circuit_lock:
+        if _circuit["state"] != "closed":
+            print("LLM circuit closed: probe request succeeded.")
+        _circuit.update(
+            state="closed",
+            reason="",
+            consecutive_failures=0,
+            cooldown_s=0.0,
+            probe_in_flight=False,
+            retry_at_utc=None,
+        )
+
+
+def record_llm_failure(exc: Exception) -> None:
+    if isinstance(exc, LLMCircuitOpenError):
+        return
+    if isinstance(exc, LLMPoolDrainedError):
+        # Says nothing about Groq itself, so a half-open probe that hit it lets the next caller probe.
+        release_llm_probe()
+        return
+    with _circuit_lock:
+        _circuit["consecutive_failures"] += 1
+        if is_rate_limit_error(exc) and is_daily_limit_error(exc):
+            hint = retry_hint_s(exc)
+            _open_circuit("daily quota (RPD) exhausted", hint if hint else _RPD_COOLDOWN_S)
+            return
+        if _circuit["state"] == "half_open":
+            _open_circuit(f"probe failed: {exc}", max(_circuit["cooldown_s"], _COOLDOWN_S) * 2)
+            return
+        if _circuit["state"] == "closed" and _circuit["consecutive_failures"] >= _FAILURE_THRESHOLD:
+            _open_circuit(f"{_circuit['consecutive_failures']} consecutive failures: {exc}", _COOLDOWN_S)
+
+
+def llm_circuit_wait_s() -> float:
+    # Seconds until the circuit will admit a request again; 0 when it already would. Read-only.
+    with _circuit_lock:
+        if _circuit["state"] == "open":
+            return max(_circuit["open_until"] - time.monotonic(), 0.0)
+        if _circuit["state"] == "half_open" and _circuit["probe_in_flight"]:
+            return 1.0
+        return 0.0
+
+
+def get_llm_circuit_status() -> dict:
+    with _circuit_lock:
+        status = dict(_circuit)
+    status.pop("open_until", None)
+    return status
@@ -0,0 +1,158 @@
+# app/local_sentiment.py - lexicon + rules sentiment/priority engine (CPU, no model download)
+
+import re
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'-]*")
+
+_POSITIVE = {
+    "agree": 1.0, "agreement": 1.0, "approve": 1.0, "approved": 1.0, "beat": 1.0, "beats": 1.0,
+    "benefit": 1.0, "boost": 1.5, "boosts": 1.5, "breakthrough": 2.0, "calm": 0.5, "celebrate": 1.5,
+    "ceasefire": 1.5, "cure": 2.0, "deal": 0.5, "gain": 1.0, "gains": 1.0, "growth": 1.0,
+    "improve": 1.0, "improved": 1.0, "improves": 1.0, "launch": 0.5, "record": 0.5, "recover": 1.0,
+    "recovery": 1.0, "relief": 1.5, "rescue": 1.0, "rescued": 1.5, "rally": 1.5, "rallies": 1.5,
+    "rise": 0.5, "rises": 0.5, "soar": 2.0, "soars": 2.0, "strong": 1.0, "success": 1.5,
+    "successful": 1.5, "surge": 1.5, "surges": 1.5, "upgrade": 1.0, "win": 1.5, "wins": 1.5,
+    "won": 1.5, "victory": 1.5, "peace": 1.5, "profit": 1.0, "profits": 1.0, "hope": 1.0,
+    "optimism": 1.5, "optimistic": 1.5, "praised": 1.0, "expands": 0.5, "hires": 0.5, "welcomed": 1.0,
+}
+
+_NEGATIVE = {
+    "accident": 1.5, "accused": 1.0, "arrest": 1.0, "arrested": 1.0, "attack": 2.0, "attacks": 2.0,
+    "ban": 1.0, "bankrupt": 2.0, "bankruptcy": 2.0, "collapse": 2.0, "collapses": 2.0, "concern": 1.0,
+    "concerns": 1.0, "crash": 2.0, "crisis": 2.0, "cut": 1.0, "cuts": 1.0, "dead": 2.5, "death": 2.0,
+    "deaths": 2.0, "decline": 1.0, "declines": 1.0, "deficit": 1.0, "delay": 0.5, "delays": 0.5,
+    "disaster": 2.5, "drop": 1.0, "drops": 1.0, "fail": 1.5, "failed": 1.5, "fall": 1.0, "falls": 1.0,
+    "fear": 1.5, "fears": 1.5, "fine": 0.5, "fined": 1.0, "fraud": 2.0, "injured": 2.0, "killed": 2.5,
+    "lawsuit": 1.0, "layoffs": 2.0, "loss": 1.5, "losses": 1.5, "murder": 2.5, "outage": 1.5,
+    "plunge": 2.0, "plunges": 2.0, "protest": 1.0, "protests": 1.0, "recession": 2.0, "risk": 1.0,
+    "scandal": 2.0, "shooting": 2.5, "shortage": 1.5, "slump": 1.5, "strike": 1.0, "sued": 1.0,
+    "threat": 1.5, "threats": 1.5, "tumble": 1.5, "tumbles": 1.5, "victims": 2.0, "violence": 2.0,
+    "war": 2.0, "warning": 1.0, "warns": 1.0, "worst": 1.5, "slams": 1.0, "charged": 1.0, "guilty": 1.0,
+    "inflation": 0.5, "tariffs": 0.5, "downgrade": 1.0, "resigns": 0.5, "missing": 1.5,
+    "kill": 2.0, "kills": 2.5, "die": 2.0, "dies": 2.0, "died": 2.0, "wounded": 2.0, "damage": 1.0,
+    "destroyed": 2.0, "flood": 1.5, "floods": 1.5, "flooding": 1.5, "storm": 1.0, "fire": 1.0,
+    "blaze": 1.5, "hack": 1.5, "breach": 1.5, "sanctions": 1.0, "unrest": 1.5, "clashes": 2.0,
+}
+
+_NEGATORS = {
+    "not", "no", "never", "without", "hardly", "isn't", "wasn't", "aren't", "didn't", "doesn't", "won't",
+}
+_NEGATION_WINDOW = 2
+
+_CRITICAL_RE = re.compile(
+    r"\b(?:mass casualt\w*|state of emergency|evacuat\w*|earthquake|tsunami|hurricane|typhoon|"
+    r"wildfires?|active shooter|terror(?:ist)? attack|explosion|missile strikes?|airstrikes?|"
+    r"shelter in place|nationwide outage|outbreak|pandemic|martial law|invasion|killed|dead)\b",
+    re.IGNORECASE,
+)
+_ROUTINE_RE = re.compile(
+    r"\b(?:review|recipes?|how to|tips|celebrity|box office|podcast|opinion|quiz|horoscope|"
+    r"trailer|red carpet|fashion|playlist|season finale|highlights|score(?:s|d)?|preview|"
+    r"deals? of the day|best (?:\w+ )?to buy|gift guide|crossword)\b",
+    re.IGNORECASE,
+)
+# Legal stories stay important unless there is an active public-safety threat (mirrors the LLM prompt).
+_CRIME_RE = re.compile(r"\b(?:charged|sentenced|trial|court|lawsuit|indicted|arrested|verdict)\b", re.IGNORECASE)
+
+_SUBJECTS = (
+    (re.compile(r"\b(?:stocks?|shares|markets?|investors|wall street|nasdaq|dow|s&p)\b", re.I), "markets"),
+    (re.compile(r"\b(?:bitcoin|crypto\w*|ethereum|token)\b", re.I), "crypto holders"),
+    (re.compile(r"\b(?:economy|inflation|gdp|interest rates?|central bank|fed)\b", re.I), "economy"),
+    (re.compile(r"\b(?:oil|gas|energy|power grid|electricity)\b", re.I), "energy sector"),
+    (re.compile(r"\b(?:company|firm|earnings|revenue|ceo|startup)\b", re.I), "business"),
+    (re.compile(r"\b(?:patients|hospital|health|virus|vaccine|disease)\b", re.I), "public health"),
+    (re.compile(r"\b(?:police|crime|court|trial|shooting|murder)\b", re.I), "public safety"),
+    (re.compile(r"\b(?:election|government|minister|president|parliament|congress|senate)\b", re.I), "government"),
+    (re.compile(r"\b(?:war|troops|military|ceasefire|missile)\b", re.I), "regional security"),
+    (re.compile(r"\b(?:team|match|league|cup|coach|season)\b", re.I), "sports fans"),
+    (re.compile(r"\b(?:ai|software|tech\w*|app|chip\w*|data)\b", re.I), "tech sector"),
+    (re.compile(r"\b(?:climate|weather|storm|flood\w*|environment)\b", re.I), "affected communities"),
+)
+
+_TONES = (
+    (-3.0, "alarming"),
+    (-1.0, "concerned"),
+    (1.0, "neutral"),
+    (3.0, "optimistic"),
+)
+
+
+def _lexicon_score(tokens: list[str]) -> tuple[float, float]:
+    positive = 0.0
+    negative = 0.0
+    negate_until = -1
+    for index, token in enumerate(tokens):
+        if token in _NEGATORS:
+            negate_until = index + _NEGATION_WINDOW
+            continue
+        weight = _POSITIVE.get(token)
+        polarity = 1.0
+        if weight is None:
+            weight = _NEGATIVE.get(token)
+            polarity = -1.0
+        if weight is None:
+            continue
+        if index <= negate_until:
+            polarity = -polarity
+        if polarity > 0:
+            positive += weight
+        else:
+            negative += weight
+    return positive, negative
+
+
+def _subject(text: str) -> str:
+    for pattern, subject in _SUBJECTS:
+        if pattern.search(text):
+            return subject
+    return "general public"
+
+
+def _tone(net: float, mixed: bool) -> str:
+    if mixed:
+        return "mixed"
+    for upper, tone in _TONES:
+        if net <= upper:
+            return tone
+    return "upbeat"
+
+
+def score_sentiment(title: str, summary: str) -> tuple[str, str, str, str, str]:
+    title = (title or "").strip()
+    combined = f"{title} {(summary or '').strip()}".strip()
+    tokens = _TOKEN_RE.findall(combined.lower())
+    # Headline words carry the framing, so count them twice.
+    positive, negative = _lexicon_score(_TOKEN_RE.findall(title.lower()) + tokens)
+    net = positive - negative
+    mixed = positive >= 2.0 and negative >= 2.0 and abs(net) < 1.5
+
+    if mixed:
+        impact_sentiment = "mixed"
+    elif net >= 1.0:
+        impact_sentiment = "positive"
+    elif net <= -1.0:
+        impact_sentiment = "negative"
+    else:
+        impact_sentiment = "neutral"
+
+    critical_hits = sorted({match.group(0).lower() for match in _CRITICAL_RE.finditer(combined)})
+    routine_hits = sorted({match.group(0).lower() for match in _ROUTINE_RE.finditer(combined)})
+    if critical_hits and (len(critical_hits) >= 2 or negative >= 4.0) and not _CRIME_RE.search(title):
+        impact_level = "critical"
+        reason = f"local rules: urgent cues ({', '.join(critical_hits[:3])})"
+    elif routine_hits and not critical_hits and negative < 3.0:
+        impact_level = "routine"
+        reason = f"local rules: informational cues ({', '.join(routine_hits[:3])})"
+    else:
+        impact_level = "important"
+        reason = "local rules: notable development, no urgent cues"
+
+    evidence = positive + negative + 1.5 * len(critical_hits) + len(routine_hits)
+    confidence = min(0.35 + 0.05 * evidence, 0.8)
+    return (
+        _tone(net, mixed),
+        f"{impact_sentiment} for {_subject(combined)}",
+        f"{confidence:.2f}",
+        impact_level,
+        reason,
+    )
@@ -1,20 +1,80 @@
-from fastapi import FastAPI, Depends, Query
-from sqlalchemy.orm import Session
-from app.db import SessionLocal
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.async_db import AsyncArchiveSessionLocal, AsyncReadSessionLocal, dispose_async_engines
 from app.models import Article
-from app.schema import ArticleOut
-from app.news_fetcher import fetch_and_store_articles, get_fetch_status, request_fetch_stop, mark_fetch_requested
+from app.schema import ArticleOut, Facets, PriorityCounts, SearchResults
+from app.article_fields import IMPACT_LEVELS_BY_RANK, SENTIMENT_BUCKET_NAMES
+from app.filters import InvalidFilterError, filter_articles, published_date_counts, to_naive_utc
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, fetch_page, summary_ordering
+from app.serialization import ARROW_MEDIA_TYPE, InvalidFieldsError, article_columns, dumps, parse_fields, pyarrow, rows_to_arrow, rows_to_json
+from app.search import SearchQueryError, SearchUnavailableError, fts_available, search_articles
+from app.news_fetcher import (
+    add_fetch_status_listener,
+    fetch_and_store_articles,
+    get_fetch_status,
+    mark_fetch_requested,
+    remove_fetch_status_listener,
+    request_fetch_stop,
+)
+from app.llm_circuit import get_llm_circuit_status
+from app.groq_pool import get_key_pool_status
+from app.hedging import get_hedge_stats
+from app.category_classifier import get_category_cascade_stats
+from app.category_rules import get_category_rule_stats
+from app.backfill import get_backfill_status, is_backfill_running, mark_backfill_requested, parse_stages, request_backfill_stop, run_backfill
+from app.retention import RETENTION_RUN_AT, get_retention_status, run_retention
+from app.models import ArchivedArticle
+from app.response_cache import cache_key, summaries_cache
+from app.export import EXPORT_MEDIA_TYPES, stream_export
+from app.http_cache import COMPRESS_MIN_BYTES, CompressionMiddleware, is_not_modified, not_modified_response, validators
+from app import metrics
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import List, Optional
+import asyncio
 import threading
 import schedule
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 import time
 import os
 from datetime import datetime, timezone
 
 app = FastAPI()
+_STATUS_STREAM_PATH = "/fetch-status/stream"
+# Brotli when the client accepts it, gzip otherwise; never for the event stream.
+app.add_middleware(
+    CompressionMiddleware,
+    compressor=BrotliMiddleware or GZipMiddleware,
+    minimum_size=COMPRESS_MIN_BYTES,
+    uncompressed_paths=(_STATUS_STREAM_PATH,),
+)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Route templates (/summaries, not /summaries?q=...) keep label cardinality bounded.
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
+
 _last_fetch_time_utc: Optional[str] = None
 _LAST_FETCH_PATH = os.path.join(os.path.dirname(__file__), "last_fetch_time.txt")
 _AUTO_FETCH_MIN_SECONDS = 2 * 60 * 60
+# Comment line sent on an idle status stream so proxies do not close it.
+_STATUS_STREAM_KEEPALIVE_S = float(os.getenv("AIDA_STATUS_STREAM_KEEPALIVE_S", "15"))
+# Updates buffered per stream client; a slow client loses the oldest, never blocks the fetch.
+_STATUS_STREAM_QUEUE_SIZE = 100
 
 
 def _parse_last_fetch_time(value: Optional[str]) -> Optional[datetime]:
@@ -67,34 +127,242 @@ def _should_auto_fetch() -> bool:
 
 _load_last_fetch_time()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def article_filters(
+    sentiment_contextual: Optional[List[str]] = Query(None),
+    sentiment_emotional: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    source: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None, description="Two-letter codes"),
+    impact_level: Optional[List[str]] = Query(None, description="critical, important or routine"),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    date: Optional[List[str]] = Query(None, description="Local calendar days (YYYY-MM-DD) in tz"),
+    tz: Optional[str] = Query(None, description="IANA timezone for date, default UTC"),
+    published_after: Optional[datetime] = Query(None),
+    published_before: Optional[datetime] = Query(None),
+    q: Optional[str] = Query(None, description="Keyword(s) matched against title and summary"),
+) -> dict:
+    # Every list filter may be repeated (?category=a&category=b) or comma-separated.
+    return {
+        "sentiment_contextual": sentiment_contextual,
+        "sentiment_emotional": sentiment_emotional,
+        "category": category,
+        "source": source,
+        "country": country,
+        "impact_level": impact_level,
+        "min_confidence": min_confidence,
+        "dates": date,
+        "tz": tz,
+        "published_after": published_after,
+        "published_before": published_before,
+        "keyword": q,
+    }
+
+def _require_arrow(format: str):
+    if format == "arrow" and pyarrow is None:
+        raise HTTPException(status_code=503, detail="format=arrow needs the optional pyarrow package on the server.")
+
+async def _filtered(db: AsyncSession, statement, filters: dict):
+    fts = await fts_available(db) if filters.get("keyword") else True
+    try:
+        return filter_articles(statement, fts=fts, **filters)
+    except (InvalidFilterError, SearchQueryError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 @app.get("/summaries", response_model=List[ArticleOut])
-def read_articles(
-    sentiment_contextual: Optional[str] = Query(None),
-    sentiment_emotional: Optional[str] = Query(None),
+async def read_articles(
+    request: Request,
+    filters: dict = Depends(article_filters),
+    sort: str = Query("newest", pattern="^(newest|priority|confidence)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit (without cursor) for every article"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated ArticleOut fields to return, default all"),
+    format: str = Query("json", pattern="^(json|arrow)$", description="arrow: Apache Arrow IPC stream"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    _require_arrow(format)
+    media_type = ARROW_MEDIA_TYPE if format == "arrow" else "application/json"
+    # Read the version before the rows, so a concurrent write can only make the tag look older than the data.
+    cache_headers = await validators(db)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    # The ETag is the data version, so a cached body can only come from the current data.
+    key = cache_key("/summaries", request.query_params.multi_items())
+    cached = summaries_cache.get(key, cache_headers["ETag"])
+    if cached is not None:
+        body, page_headers = cached
+        return Response(content=body, media_type=media_type, headers={**cache_headers, **page_headers})
+    try:
+        selected = parse_fields(fields)
+    except InvalidFieldsError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Plain column tuples encoded straight to JSON; ArticleOut only documents the shape.
+    statement = await _filtered(db, select(*article_columns(selected)), filters)
+    page_headers = {}
+    if limit is None and cursor is None:
+        rows = (await db.execute(statement.order_by(*summary_ordering(sort)))).all()
+    else:
+        try:
+            rows, next_cursor = await fetch_page(db, statement, sort, limit or DEFAULT_PAGE_SIZE, cursor)
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        # The body stays a plain list for existing clients; the next page is announced in headers.
+        if next_cursor:
+            next_url = request.url.include_query_params(cursor=next_cursor, limit=limit or DEFAULT_PAGE_SIZE)
+            page_headers["X-Next-Cursor"] = next_cursor
+            page_headers["Link"] = f'<{next_url}>; rel="next"'
+    body = rows_to_arrow(rows, selected) if format == "arrow" else rows_to_json(rows, selected)
+    summaries_cache.put(key, cache_headers["ETag"], body, page_headers)
+    return Response(content=body, media_type=media_type, headers={**cache_headers, **page_headers})
+
+@app.get("/export")
+async def export_articles(
+    request: Request,
+    filters: dict = Depends(article_filters),
+    format: str = Query("ndjson", pattern="^(ndjson|csv|arrow)$"),
+    sort: str = Query("newest", pattern="^(newest|priority|confidence)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated ArticleOut fields to export, default all"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    _require_arrow(format)
+    cache_headers = await validators(db)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    try:
+        selected = parse_fields(fields)
+    except InvalidFieldsError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Filters are validated here, so a bad one is still a 400 rather than a broken stream.
+    statement = await _filtered(db, select(*article_columns(selected)), filters)
+    statement = statement.order_by(*summary_ordering(sort))
+    filename = f"aida-articles-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    headers = {**cache_headers, "Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(stream_export(statement, selected, format), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@app.get("/priority-counts", response_model=PriorityCounts)
+async def priority_counts(
+    request: Request,
+    response: Response,
+    filters: dict = Depends(article_filters),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cache_headers = await validators(db)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    response.headers.update(cache_headers)
+
+    async def _grouped(column):
+        statement = await _filtered(db, select(column, func.count()), filters)
+        return (await db.execute(statement.group_by(column))).all()
+
+    impact = {level: 0 for level in ("critical", "important", "routine")}
+    total = 0
+    for rank, count in await _grouped(Article.impact_rank):
+        total += count
+        level = IMPACT_LEVELS_BY_RANK.get(rank)
+        if level:
+            impact[level] = count
+    sentiment = {"positive": 0, "negative": 0, "neutral": 0}
+    for bucket, count in await _grouped(Article.sentiment_bucket):
+        name = SENTIMENT_BUCKET_NAMES.get(bucket)
+        if name:
+            sentiment[name] += count
+    return {"total": total, "impact_level": impact, "sentiment": sentiment}
+
+@app.get("/facets", response_model=Facets)
+async def facets(
+    request: Request,
+    response: Response,
+    tz: Optional[str] = Query(None, description="IANA timezone for the date facet, default UTC"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cache_headers = await validators(db)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    response.headers.update(cache_headers)
+
+    # Filter options with article counts, so clients never need the full list to build their controls.
+    async def _counts(column):
+        statement = select(column, func.count()).where(column.isnot(None), column != "").group_by(column)
+        rows = (await db.execute(statement)).all()
+        return {value: count for value, count in sorted(rows, key=lambda row: (-row[1], row[0]))}
+
+    impact = {}
+    statement = select(Article.impact_rank, func.count()).group_by(Article.impact_rank)
+    for rank, count in (await db.execute(statement)).all():
+        level = IMPACT_LEVELS_BY_RANK.get(rank)
+        if level:
+            impact[level] = count
+    try:
+        dates = await published_date_counts(db, tz)
+    except InvalidFilterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {
+        "category": await _counts(Article.category),
+        "source": await _counts(Article.source),
+        "country": await _counts(Article.country),
+        "impact_level": {level: impact[level] for level in ("critical", "important", "routine") if level in impact},
+        "date": dates,
+    }
+
+async def get_archive_db():
+    async with AsyncArchiveSessionLocal() as db:
+        yield db
+
+@app.get("/archive", response_model=List[ArticleOut])
+async def read_archived_articles(
     category: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    published_after: Optional[datetime] = Query(None),
+    published_before: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_archive_db)
 ):
-    query = db.query(Article)
-    if sentiment_contextual:
-        query = query.filter(Article.sentiment_contextual == sentiment_contextual)
-    if sentiment_emotional:
-        query = query.filter(Article.sentiment_emotional == sentiment_emotional)
+    statement = select(ArchivedArticle)
     if category:
-        query = query.filter(Article.category == category)
+        statement = statement.where(ArchivedArticle.category == category)
     if source:
-        query = query.filter(Article.source == source)
-    return query.order_by(Article.published_at.desc()).all()
+        statement = statement.where(ArchivedArticle.source == source)
+    if published_after:
+        statement = statement.where(ArchivedArticle.published_at >= to_naive_utc(published_after))
+    if published_before:
+        statement = statement.where(ArchivedArticle.published_at < to_naive_utc(published_before))
+    statement = (
+        statement.order_by(ArchivedArticle.published_at.desc(), ArchivedArticle.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return (await db.execute(statement)).scalars().all()
+
+@app.get("/search", response_model=SearchResults)
+async def search(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description='Words are ANDed; use "exact phrase", prefix*, OR and NOT.'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cache_headers = await validators(db)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    response.headers.update(cache_headers)
+    try:
+        total, hits = await search_articles(db, q, limit=limit, offset=offset)
+    except SearchQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except SearchUnavailableError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return {"query": q, "total": total, "limit": limit, "offset": offset, "results": hits}
 
 @app.post("/refresh-news")
 def refresh_news():
+    if is_backfill_running():
+        raise HTTPException(status_code=409, detail="A backfill is running; refresh after it finishes or stop it with POST /backfill/stop.")
     def _run_fetch():
         try:
             fetch_and_store_articles()
@@ -108,13 +376,132 @@ def refresh_news():
     thread.start()
     return {"message": "News refresh started"}
 
+@app.post("/backfill")
+def start_backfill(
+    stages: str = Query("sentiment,category", description="Comma-separated: summary, sentiment, category"),
+    only_degraded: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    try:
+        stage_list = parse_stages(stages)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if is_backfill_running():
+        raise HTTPException(status_code=409, detail="A backfill is already running.")
+    if get_fetch_status().get("state") in ("starting", "fetching", "processing"):
+        raise HTTPException(status_code=409, detail="A fetch is running; start the backfill after it finishes.")
+
+    def _run():
+        try:
+            run_backfill(stage_list, only_degraded=only_degraded, limit=limit)
+        except Exception as exc:
+            print(f"Backfill failed: {exc}")
+
+    mark_backfill_requested(stage_list, only_degraded)
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return {"message": "Backfill started", "stages": stage_list}
+
+@app.post("/backfill/stop")
+def stop_backfill():
+    if not is_backfill_running():
+        raise HTTPException(status_code=409, detail="No backfill is running.")
+    request_backfill_stop()
+    return {"message": "Backfill stop requested; it stops after the current chunk."}
+
+@app.get("/backfill-status")
+def backfill_status():
+    return get_backfill_status()
+
 @app.get("/last-fetch-time")
-def last_fetch_time():
+async def last_fetch_time(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    # A fetch that stored nothing still moves the time, so it is part of the tag.
+    cache_headers = await validators(db, _last_fetch_time_utc)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+    response.headers.update(cache_headers)
     return {"last_fetch_time_utc": _last_fetch_time_utc}
 
 @app.get("/fetch-status")
 def fetch_status():
-    return get_fetch_status()
+    status = get_fetch_status()
+    status["llm_circuit"] = get_llm_circuit_status()
+    status["groq_key_pools"] = get_key_pool_status()
+    status["llm_hedging"] = get_hedge_stats()
+    status["category_cascade"] = get_category_cascade_stats()
+    status["category_rules"] = get_category_rule_stats()
+    status["retention"] = get_retention_status()
+    status["backfill"] = get_backfill_status()
+    status["response_cache"] = summaries_cache.stats()
+    return status
+
+def _collect_metrics():
+    cache = summaries_cache.stats()
+    key_states = []
+    for pool in get_key_pool_status():
+        counts = {"active": 0, "cooling": 0, "drained": 0}
+        for key in pool["keys"]:
+            counts[key["state"]] += 1
+        key_states.extend(({"purpose": pool["purpose"], "state": state}, count) for state, count in counts.items())
+    return [
+        ("aida_response_cache_bytes", "gauge", "Bytes held by the serialized response cache.",
+         [({"cache": "summaries"}, cache["bytes"])]),
+        ("aida_response_cache_entries", "gauge", "Entries held by the serialized response cache.",
+         [({"cache": "summaries"}, cache["entries"])]),
+        ("aida_llm_circuit_open", "gauge", "1 while the shared Groq circuit breaker is open or probing.",
+         [({}, int(get_llm_circuit_status()["state"] != "closed"))]),
+        ("aida_groq_keys", "gauge", "Groq API keys per purpose by state.", key_states),
+        ("aida_fetch_running", "gauge", "1 while a news fetch is running.",
+         [({}, int(get_fetch_status().get("state") in ("starting", "fetching", "processing")))]),
+        ("aida_backfill_running", "gauge", "1 while a backfill is running.", [({}, int(is_backfill_running()))]),
+    ]
+
+metrics.register_collector(_collect_metrics)
+
+@app.get("/metrics")
+def read_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def _status_event(snapshot: dict) -> bytes:
+    return f"id: {snapshot['seq']}\nevent: status\ndata: ".encode("utf-8") + dumps(snapshot) + b"\n\n"
+
+@app.get(_STATUS_STREAM_PATH)
+async def fetch_status_stream(request: Request):
+    # Server-Sent Events: one event per fetch status transition, pushed as _set_fetch_status runs.
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_STATUS_STREAM_QUEUE_SIZE)
+
+    def _enqueue(snapshot):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+    def _listener(snapshot):
+        # Runs on the fetch thread; hand the snapshot to the event loop.
+        loop.call_soon_threadsafe(_enqueue, snapshot)
+
+    add_fetch_status_listener(_listener)
+
+    async def _events():
+        try:
+            snapshot = get_fetch_status()
+            yield b"retry: 2000\n" + _status_event(snapshot)
+            last_seq = snapshot["seq"]
+            while not await request.is_disconnected():
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=_STATUS_STREAM_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if snapshot["seq"] <= last_seq:
+                    continue
+                last_seq = snapshot["seq"]
+                yield _status_event(snapshot)
+        finally:
+            remove_fetch_status_listener(_listener)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_events(), media_type="text/event-stream", headers=headers)
 
 
 def run_scheduler():
@@ -131,7 +518,20 @@ def run_scheduler():
         _record_fetch_time()
         print("Auto-fetch finished.")
 
+    def _run_retention():
+        if get_fetch_status().get("state") in ("starting", "fetching", "processing"):
+            print("Retention skipped: a fetch is running.")
+            return
+        if is_backfill_running():
+            print("Retention skipped: a backfill is running.")
+            return
+        try:
+            run_retention()
+        except Exception as exc:
+            print(f"Scheduled retention failed: {exc}")
+
     schedule.every(2).hours.do(_maybe_auto_fetch)
+    schedule.every().day.at(RETENTION_RUN_AT).do(_run_retention)
     _maybe_auto_fetch()
     while True:
         schedule.run_pending()
@@ -145,5 +545,7 @@ def start_background_news_scheduler():
     thread.start()
 
 @app.on_event("shutdown")
-def stop_background_news_scheduler():
+async def stop_background_news_scheduler():
     request_fetch_stop()
+    request_backfill_stop()
+    await dispose_async_engines()
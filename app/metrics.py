@@ -0,0 +1,223 @@
+# app/metrics.py - in-process metrics registry, rendered in the Prometheus text format on /metrics
+#
+# Standard library only, so every module (including the ones the dashboard imports) can record
+# without an extra dependency. Values live in the process that records them, i.e. the API server.
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; wide enough for sub-millisecond cache reads and for multi-minute LLM rate-limit waits.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_registry_lock = threading.Lock()
+_metrics = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        with _registry_lock:
+            _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple, **extra) -> dict:
+        return dict(zip(self.labelnames, key), **extra)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, self._labels(key), value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, then sum and count.
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", self._labels(key, le=_format_value(bound)), cumulative
+            yield f"{self.name}_bucket", self._labels(key, le="+Inf"), count
+            yield f"{self.name}_sum", self._labels(key), total
+            yield f"{self.name}_count", self._labels(key), count
+
+
+def register_collector(collect) -> None:
+    # collect() runs on every scrape and returns [(name, kind, help, [(labels, value), ...]), ...]
+    # for values that already live elsewhere (pool sizes, circuit state) and are read, not recorded.
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_metrics)
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for collect in collectors:
+        try:
+            families = collect()
+        except Exception as exc:
+            print(f"Metrics collector failed: {exc}")
+            continue
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "aida_stage_duration_seconds",
+    "Time spent per article in each pipeline stage (download, extract, summarize, sentiment, category, persist).",
+    ("stage",),
+)
+STAGE_RESULTS = Counter(
+    "aida_stage_results_total",
+    "Enrichment results by the engine that produced them (llm, local, extractive, rules, cache, default).",
+    ("stage", "source"),
+)
+FETCH_ARTICLES = Counter(
+    "aida_fetch_articles_total",
+    "Articles handled by fetches, by outcome (stored, duplicate, error).",
+    ("outcome",),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "aida_llm_request_duration_seconds",
+    "Groq chat completion latency per key-pool purpose and outcome (ok, rate_limited, error).",
+    ("purpose", "outcome"),
+)
+LLM_RATE_LIMITED = Counter(
+    "aida_llm_rate_limited_total",
+    "Groq 429 responses per key-pool purpose and limit (tpm, rpd).",
+    ("purpose", "limit"),
+)
+LLM_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "aida_llm_rate_limit_wait_seconds",
+    "Time a stage slept before retrying after a Groq TPM rate limit.",
+    ("stage",),
+)
+CACHE_LOOKUPS = Counter(
+    "aida_cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss).",
+    ("cache", "result"),
+)
+QUEUE_DEPTH = Gauge(
+    "aida_queue_depth",
+    "Articles submitted to a worker pool and not yet finished (fetch, backfill).",
+    ("queue",),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "aida_http_request_duration_seconds",
+    "API latency until the response starts, by method, route template and status code.",
+    ("method", "route", "status"),
+)
+
+
+def record_stage_result(stage: str, source: str) -> None:
+    STAGE_RESULTS.inc(stage=stage, source=source)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,278 @@
+# app/migrations.py - versioned SQLite schema migrations tracked in PRAGMA user_version
+#
+#   python -m app.migrations               apply pending migrations to ./aida.db
+#   python -m app.migrations --check-plans also fail if a hot query plans a full scan
+
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+try:
+    from app.article_fields import typed_fields
+except ModuleNotFoundError:
+    from article_fields import typed_fields
+
+_BACKFILL_BATCH = 1000
+
+
+def _add_column(conn, table: str, column: str, column_type: str) -> None:
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+    if column in existing:
+        return
+    try:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+    except OperationalError as exc:
+        # Another process (API vs dashboard) may have added it first.
+        if "duplicate column" not in str(exc).lower():
+            raise
+
+
+def _legacy_article_columns(conn) -> None:
+    # Columns that used to be patched in by _ensure_sqlite_column at import time.
+    _add_column(conn, "articles", "impact_level", "TEXT")
+    _add_column(conn, "articles", "impact_reason", "TEXT")
+    _add_column(conn, "articles", "image_url", "TEXT")
+    _add_column(conn, "articles", "degraded_stages", "TEXT")
+
+
+def _hot_query_indexes(conn) -> None:
+    # /summaries sorts by published_at and filters on one of these columns at a time.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_published_at_id ON articles (published_at, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_category_published_at ON articles (category, published_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_source_published_at ON articles (source, published_at)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_articles_sentiment_contextual_published_at "
+        "ON articles (sentiment_contextual, published_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_articles_sentiment_emotional_published_at "
+        "ON articles (sentiment_emotional, published_at)"
+    ))
+    # The composite index covers device_id-only lookups, so the single-column one is redundant.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_reads_device_date ON user_reads (device_id, read_date)"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_user_reads_device_id"))
+
+
+def _articles_fts(conn) -> None:
+    # External-content FTS5 index over title/summary, kept in sync with articles by triggers.
+    try:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+            "title, summary, content='articles', content_rowid='id', tokenize='porter unicode61')"
+        ))
+    except OperationalError as exc:
+        if "fts5" not in str(exc).lower():
+            raise
+        print(f"SQLite was built without FTS5, /search will be unavailable: {exc}")
+        return
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN "
+        "INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary); "
+        "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN "
+        "INSERT INTO articles_fts(articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary); "
+        "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, summary ON articles BEGIN "
+        "INSERT INTO articles_fts(articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary); "
+        "INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary); "
+        "END"
+    ))
+    conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+
+
+def backfill_typed_fields(conn, table: str) -> int:
+    # Fills confidence_score/impact_rank/sentiment_bucket and normalizes country, keyset-paged by id.
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                f"SELECT id, sentiment_confidence, impact_level, sentiment_contextual, country FROM {table} "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": _BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            return updated
+        params = [dict(typed_fields(*row[1:]), id=row[0]) for row in rows]
+        conn.execute(
+            text(
+                f"UPDATE {table} SET confidence_score = :confidence_score, impact_rank = :impact_rank, "
+                "sentiment_bucket = :sentiment_bucket, country = :country WHERE id = :id"
+            ),
+            params,
+        )
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def _typed_article_columns(conn) -> None:
+    _add_column(conn, "articles", "confidence_score", "REAL")
+    _add_column(conn, "articles", "impact_rank", "SMALLINT")
+    _add_column(conn, "articles", "sentiment_bucket", "SMALLINT")
+    print(f"Backfilled typed fields for {backfill_typed_fields(conn, 'articles')} articles.")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_impact_rank_published_at ON articles (impact_rank, published_at)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_articles_sentiment_bucket_published_at ON articles (sentiment_bucket, published_at)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_country_published_at ON articles (country, published_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_articles_confidence_score ON articles (confidence_score)"))
+
+
+def _keyset_page_indexes(conn) -> None:
+    # Cursor pages on sort=confidence seek on (confidence_score, published_at, id); the
+    # single-column index left the published_at tiebreak to a temp b-tree sort.
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_articles_confidence_score_published_at "
+        "ON articles (confidence_score, published_at)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_articles_confidence_score"))
+
+
+def _data_version(conn) -> None:
+    # One-row counter bumped by every article write; HTTP validators (ETag/Last-Modified) derive from it.
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS data_version ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, changed_at TEXT NOT NULL)"
+    ))
+    conn.execute(text(
+        "INSERT OR IGNORE INTO data_version (id, version, changed_at) "
+        "VALUES (1, 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))"
+    ))
+    for name, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS articles_version_{name} AFTER {event} ON articles BEGIN "
+            "UPDATE data_version SET version = version + 1, changed_at = strftime('%Y-%m-%d %H:%M:%f', 'now') "
+            "WHERE id = 1; "
+            "END"
+        ))
+
+
+def add_missing_columns(engine, table) -> list[str]:
+    # For databases outside the versioned chain (the archive file): add any model column the file lacks.
+    added = []
+    with engine.begin() as conn:
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table.name})")).fetchall()}
+        for column in table.columns:
+            if column.name not in existing:
+                _add_column(conn, table.name, column.name, column.type.compile(engine.dialect))
+                added.append(column.name)
+    return added
+
+
+# Append only: a migration's position is its version number, and applied ones never run again.
+MIGRATIONS = [
+    (1, "legacy article columns", _legacy_article_columns),
+    (2, "hot query indexes", _hot_query_indexes),
+    (3, "articles full-text index", _articles_fts),
+    (4, "typed article columns", _typed_article_columns),
+    (5, "keyset page indexes", _keyset_page_indexes),
+    (6, "data version counter", _data_version),
+]
+
+
+def schema_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def run_migrations(engine) -> int:
+    if engine.url.get_backend_name() != "sqlite":
+        return 0
+    applied = 0
+    for version, name, migrate in MIGRATIONS:
+        # One short transaction per step, so readers (WAL) and other writers are only held up briefly.
+        with engine.begin() as conn:
+            if schema_version(conn) >= version:
+                continue
+            print(f"Applying migration {version}: {name}")
+            migrate(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
+            applied += 1
+    if applied:
+        with engine.begin() as conn:
+            conn.execute(text("PRAGMA optimize"))
+    return applied
+
+
+def _hot_queries():
+    from datetime import datetime
+    from sqlalchemy import select, tuple_
+    try:
+        from app.models import Article, UserRead, UserStreak
+    except ModuleNotFoundError:
+        from models import Article, UserRead, UserStreak
+
+    newest_first = Article.published_at.desc()
+    return {
+        "summaries": select(Article).order_by(newest_first),
+        "summaries by category": select(Article).where(Article.category == "economy").order_by(newest_first),
+        "summaries by source": select(Article).where(Article.source == "Reuters").order_by(newest_first),
+        "summaries by contextual sentiment": (
+            select(Article).where(Article.sentiment_contextual == "positive for markets").order_by(newest_first)
+        ),
+        "summaries by emotional sentiment": (
+            select(Article).where(Article.sentiment_emotional == "optimistic").order_by(newest_first)
+        ),
+        "dedupe by url": select(Article.url).where(Article.url.in_(["https://example.com/a", "https://example.com/b"])),
+        "read urls for device/day": (
+            select(UserRead.article_url).where(UserRead.device_id == "device", UserRead.read_date == "2024-01-01")
+        ),
+        "summaries by priority": select(Article).where(Article.impact_rank == 2).order_by(newest_first),
+        "summaries by country": select(Article).where(Article.country == "US").order_by(newest_first),
+        "streak for device": select(UserStreak).where(UserStreak.device_id == "device"),
+        "summaries for a local day": (
+            select(Article)
+            .where(Article.published_at >= datetime(2024, 1, 1, 5), Article.published_at < datetime(2024, 1, 2, 5))
+            .order_by(newest_first)
+        ),
+        "summaries page after cursor": (
+            select(Article)
+            .where(tuple_(Article.published_at, Article.id) < tuple_(datetime(2024, 1, 1), 1000))
+            .order_by(newest_first, Article.id.desc())
+            .limit(50)
+        ),
+        "summaries by confidence after cursor": (
+            select(Article)
+            .where(
+                tuple_(Article.confidence_score, Article.published_at, Article.id)
+                < tuple_(0.5, datetime(2024, 1, 1), 1000)
+            )
+            .order_by(Article.confidence_score.desc(), newest_first, Article.id.desc())
+            .limit(50)
+        ),
+    }
+
+
+def check_query_plans(engine) -> list[str]:
+    # Returns one message per hot query whose plan scans a table without an index or sorts in a temp b-tree.
+    problems = []
+    with engine.connect() as conn:
+        for label, statement in _hot_queries().items():
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()]
+            for step in plan:
+                full_scan = step.startswith("SCAN") and "USING" not in step
+                if full_scan or "USE TEMP B-TREE" in step:
+                    problems.append(f"{label}: {step}")
+    return problems
+
+
+if __name__ == "__main__":
+    try:
+        from app.db import engine
+    except ModuleNotFoundError:
+        from db import engine
+
+    # Importing db already applies pending migrations; report where the schema ended up.
+    with engine.connect() as conn:
+        print(f"Schema version: {schema_version(conn)} (latest {MIGRATIONS[-1][0]})")
+    if "--check-plans" in sys.argv:
+        issues = check_query_plans(engine)
+        for issue in issues:
+            print(f"Full scan: {issue}")
+        if issues:
+            sys.exit(1)
+        print("All hot queries use an index.")
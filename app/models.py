@@ -1,13 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, DateTime, Float, ForeignKey, Index, LargeBinary, UniqueConstraint, event
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 import datetime
+try:
+    from app.article_fields import typed_fields
+except ModuleNotFoundError:
+    from article_fields import typed_fields
 
 Base = declarative_base()
 
 # 3. models.py ƒ?" Update schema with dual sentiment fields
-class Article(Base):
-    __tablename__ = "articles"
-    __table_args__ = (UniqueConstraint("url", name="uq_articles_url"),)
+class ArticleColumns:
+    # Shared by the live table and the archive, so archived rows keep every field.
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
     summary = Column(String)
@@ -20,8 +26,57 @@ class Article(Base):
     source = Column(String)
     url = Column(String)
     category = Column(String)
-    country = Column(String)
+    # ISO 3166-1 alpha-2, upper case.
+    country = Column(String(2))
     published_at = Column(DateTime, default=datetime.datetime.utcnow)
+    degraded_stages = Column(String)
+    # Typed copies of the string fields above, kept in sync on every insert/update.
+    confidence_score = Column(Float)
+    impact_rank = Column(SmallInteger)
+    sentiment_bucket = Column(SmallInteger)
+
+
+class Article(ArticleColumns, Base):
+    __tablename__ = "articles"
+    # Composite indexes are created for existing databases by app/migrations.py; keep the names in sync.
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_articles_url"),
+        Index("ix_articles_published_at_id", "published_at", "id"),
+        Index("ix_articles_category_published_at", "category", "published_at"),
+        Index("ix_articles_source_published_at", "source", "published_at"),
+        Index("ix_articles_sentiment_contextual_published_at", "sentiment_contextual", "published_at"),
+        Index("ix_articles_sentiment_emotional_published_at", "sentiment_emotional", "published_at"),
+        Index("ix_articles_impact_rank_published_at", "impact_rank", "published_at"),
+        Index("ix_articles_sentiment_bucket_published_at", "sentiment_bucket", "published_at"),
+        Index("ix_articles_country_published_at", "country", "published_at"),
+        Index("ix_articles_confidence_score_published_at", "confidence_score", "published_at"),
+    )
+    # Loaded only when accessed; list queries never touch the compressed text.
+    content = relationship("ArticleContent", uselist=False, lazy="select", cascade="all, delete-orphan")
+
+
+class ArticleContent(Base):
+    __tablename__ = "article_content"
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    text_length = Column(Integer)
+    compressed_length = Column(Integer)
+    # Which extractor produced the text (readability, newspaper, newsapi) and from where.
+    extractor = Column(String)
+    source_url = Column(String)
+    http_status = Column(Integer)
+    extracted_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+@event.listens_for(Article, "before_insert")
+@event.listens_for(Article, "before_update")
+def _sync_typed_fields(mapper, connection, target):
+    fields = typed_fields(
+        target.sentiment_confidence, target.impact_level, target.sentiment_contextual, target.country
+    )
+    for key, value in fields.items():
+        setattr(target, key, value)
 
 
 class UserStreak(Base):
@@ -36,9 +91,25 @@ class UserStreak(Base):
 
 class UserRead(Base):
     __tablename__ = "user_reads"
-    __table_args__ = (UniqueConstraint("device_id", "article_url", "read_date", name="uq_user_reads"),)
+    __table_args__ = (
+        UniqueConstraint("device_id", "article_url", "read_date", name="uq_user_reads"),
+        Index("ix_user_reads_device_date", "device_id", "read_date"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    device_id = Column(String, index=True, nullable=False)
+    device_id = Column(String, nullable=False)
     article_url = Column(String, nullable=False)
     read_date = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# Lives in its own SQLite file (see app/retention.py), so it has its own metadata.
+ArchiveBase = declarative_base()
+
+
+class ArchivedArticle(ArticleColumns, ArchiveBase):
+    __tablename__ = "articles_archive"
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_articles_archive_url"),
+        Index("ix_articles_archive_published_at_id", "published_at", "id"),
+    )
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
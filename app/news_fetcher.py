@@ -7,17 +7,23 @@ from datetime import datetime, timezone
 from sqlalchemy.exc import IntegrityError
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.db import SessionLocal
+from app.db import SessionLocal, writer_job_lock
 from app.models import Article
-from app.utils import extract_full_text, clean_for_summarization
+from app.utils import extract_full_text_with_meta
+from app.content_store import build_content
+from app.text_analysis import TextAnalysis
 from app.summarizer import generate_summary
 from app.sentiment import get_dual_sentiment
 from app.category_classifier import classify_category
+from app.budget import CATEGORY_SHARE_S, SENTIMENT_SHARE_S, ArticleBudget
+from app.retention import archived_urls
+from app.metrics import FETCH_ARTICLES, QUEUE_DEPTH, STAGE_SECONDS
 
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
 NEWSAPI_URL = "https://newsapi.org/v2/top-headlines"
 COUNTRIES = ["us", "sg", "gb"]  # Add more country codes as needed
 PAGE_SIZE = 100  # Max is 100 per request
+_DOWNLOAD_TIMEOUT_S = 15
 
 _fetch_status_lock = threading.Lock()
 _fetch_status = {
@@ -25,10 +31,16 @@ _fetch_status = {
     "message": "Idle",
     "total": 0,
     "processed": 0,
+    "stored": 0,
+    "errors": 0,
+    "skipped_duplicates": 0,
     "started_at_utc": None,
     "finished_at_utc": None,
+    # Bumped on every change, so stream clients can tell updates apart and resume.
+    "seq": 0,
 }
 _fetch_stop_event = threading.Event()
+_fetch_status_listeners = []
 
 def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -36,6 +48,26 @@ def _now_utc_iso() -> str:
 def _set_fetch_status(**updates):
     with _fetch_status_lock:
         _fetch_status.update(updates)
+        _fetch_status["seq"] += 1
+        snapshot = dict(_fetch_status)
+        listeners = list(_fetch_status_listeners)
+    # Called outside the lock from the fetch thread; listeners must only hand the snapshot off.
+    for listener in listeners:
+        try:
+            listener(snapshot)
+        except Exception as exc:
+            print(f"Fetch status listener failed: {exc}")
+
+
+def add_fetch_status_listener(listener):
+    with _fetch_status_lock:
+        _fetch_status_listeners.append(listener)
+
+
+def remove_fetch_status_listener(listener):
+    with _fetch_status_lock:
+        if listener in _fetch_status_listeners:
+            _fetch_status_listeners.remove(listener)
 
 
 def get_fetch_status():
@@ -48,6 +80,9 @@ def mark_fetch_requested():
         message="Starting fetch...",
         total=0,
         processed=0,
+        stored=0,
+        errors=0,
+        skipped_duplicates=0,
         started_at_utc=_now_utc_iso(),
         finished_at_utc=None,
     )
@@ -62,15 +97,21 @@ def _should_stop_fetch() -> bool:
     return _fetch_stop_event.is_set()
 
 
-def build_article(article, country):
+def build_article(article, country, budget: ArticleBudget | None = None):
+    if budget is None:
+        budget = ArticleBudget()
     title = article.get("title")
     url = article.get("url")
     source = article.get("source", {}).get("name", "Unknown")
     published = article.get("publishedAt")
     image_url = article.get("urlToImage")
 
-    full_text = extract_full_text(url)
+    full_text, extraction = extract_full_text_with_meta(
+        url, timeout=min(_DOWNLOAD_TIMEOUT_S, max(budget.remaining_s(), 1.0))
+    )
     content_to_summarize = full_text if full_text else article.get("description", "No summary")
+    if not full_text:
+        extraction["extractor"] = "newsapi_description"
     if (source or "").lower() == "financial times":
         desc = article.get("description") or ""
         content = article.get("content") or ""
@@ -78,10 +119,25 @@ def build_article(article, country):
         print(f"[FT debug] full_text_len={len(full_text)}")
         print(f"[FT debug] description_len={len(desc)} snippet={desc[:200]!r}")
         print(f"[FT debug] content_len={len(content)} snippet={content[:200]!r}")
-    clean_text = clean_for_summarization(content_to_summarize)
-    summary = generate_summary(clean_text)
-    sentiment_emotional, sentiment_contextual, confidence, impact_level, impact_reason = get_dual_sentiment(title, summary)
-    category = classify_category(f"{title} {summary}")
+    # One analysis per text: the body feeds the summary, title + summary feeds sentiment and category.
+    body = TextAnalysis(content_to_summarize, clean=True)
+    # Earlier stages leave a share of the budget for later ones, so one slow LLM stage cannot starve the rest.
+    with STAGE_SECONDS.time(stage="summarize"):
+        summary = generate_summary(
+            body.normalized, budget=budget.reserving(SENTIMENT_SHARE_S + CATEGORY_SHARE_S), analysis=body
+        )
+    headline = TextAnalysis(f"{title or ''} {summary or ''}")
+    with STAGE_SECONDS.time(stage="sentiment"):
+        sentiment_emotional, sentiment_contextual, confidence, impact_level, impact_reason = get_dual_sentiment(
+            title, summary, budget=budget.reserving(CATEGORY_SHARE_S), analysis=headline
+        )
+    with STAGE_SECONDS.time(stage="category"):
+        category = classify_category(headline.normalized, budget=budget, analysis=headline)
+    if budget.degraded:
+        print(
+            f"Article degraded after {budget.elapsed_s():.1f}s "
+            f"({', '.join(budget.degraded)}), queued for upgrade: {title}"
+        )
 
     try:
         published_at = datetime.strptime(published, "%Y-%m-%dT%H:%M:%SZ")
@@ -89,6 +145,8 @@ def build_article(article, country):
         published_at = datetime.utcnow()
 
     return Article(
+        # Kept so later re-enrichment can skip the download; loaded lazily, never by list queries.
+        content=build_content(body.normalized, extraction),
         title=title,
         summary=summary,
         sentiment_emotional=sentiment_emotional,
@@ -101,7 +159,8 @@ def build_article(article, country):
         url=url,
         category=category,
         country=country.upper(),
-        published_at=published_at
+        published_at=published_at,
+        degraded_stages=",".join(budget.degraded) or None,
     )
 
 
@@ -113,6 +172,9 @@ def fetch_and_store_articles():
         message="Starting fetch...",
         total=0,
         processed=0,
+        stored=0,
+        errors=0,
+        skipped_duplicates=0,
         started_at_utc=_now_utc_iso(),
         finished_at_utc=None,
     )
@@ -122,6 +184,10 @@ def fetch_and_store_articles():
         _set_fetch_status(state="error", message=msg, finished_at_utc=_now_utc_iso())
         return
 
+    if not writer_job_lock.acquire(blocking=False):
+        _set_fetch_status(message="Waiting for another database job to finish...")
+        writer_job_lock.acquire()
+    # Held from the first query to the final commit, like the writer connection itself.
     db = SessionLocal()
     all_articles = []
     per_country_counts = {country: 0 for country in COUNTRIES}
@@ -171,6 +237,8 @@ def fetch_and_store_articles():
         existing_urls = set()
         if urls:
             existing_urls = {row[0] for row in db.query(Article.url).filter(Article.url.in_(urls)).all()}
+            # Archived articles were already processed once; don't bring them back into the live table.
+            existing_urls |= archived_urls(urls)
 
         seen_urls = set()
         new_articles = []
@@ -186,18 +254,24 @@ def fetch_and_store_articles():
 
         if skipped_duplicates:
             print(f"Skipped {skipped_duplicates} duplicate articles.")
+            FETCH_ARTICLES.inc(skipped_duplicates, outcome="duplicate")
         total = len(new_articles)
         _set_fetch_status(
             state="processing",
             message=f"Processing 0/{total} articles",
             total=total,
             processed=0,
+            skipped_duplicates=skipped_duplicates,
         )
 
         processed = 0
+        stored = 0
+        errors = 0
         with ThreadPoolExecutor(max_workers=6) as pool:
             futures = [pool.submit(build_article, article, country) for article, country in new_articles]
+            QUEUE_DEPTH.set(total, queue="fetch")
             for future in as_completed(futures):
+                QUEUE_DEPTH.set(total - processed - 1, queue="fetch")
                 if _should_stop_fetch():
                     _set_fetch_status(
                         state="canceled",
@@ -210,21 +284,27 @@ def fetch_and_store_articles():
                 except Exception as exc:
                     print("Error processing article:", exc)
                     processed += 1
+                    errors += 1
+                    FETCH_ARTICLES.inc(outcome="error")
                     _set_fetch_status(
                         processed=processed,
+                        errors=errors,
                         message=f"Processing {processed}/{total} articles",
                     )
                     continue
 
                 if new_article:
                     try:
-                        with db.begin_nested():
+                        with STAGE_SECONDS.time(stage="persist"), db.begin_nested():
                             db.add(new_article)
                             db.flush()
                     except IntegrityError:
                         db.rollback()
                         skipped_duplicates += 1
+                        FETCH_ARTICLES.inc(outcome="duplicate")
                     else:
+                        stored += 1
+                        FETCH_ARTICLES.inc(outcome="stored")
                         print(
                             f"Fetched news article {new_article.title}, from country: {new_article.country}, source: {new_article.source}"
                         )
@@ -232,10 +312,13 @@ def fetch_and_store_articles():
                 processed += 1
                 _set_fetch_status(
                     processed=processed,
+                    stored=stored,
+                    skipped_duplicates=skipped_duplicates,
                     message=f"Processing {processed}/{total} articles",
                 )
 
-        db.commit()
+        with STAGE_SECONDS.time(stage="commit"):
+            db.commit()
         print(f"?. Stored {len(all_articles)} articles from {len(COUNTRIES)} countries.")
         _set_fetch_status(
             state="done",
@@ -248,7 +331,9 @@ def fetch_and_store_articles():
         _set_fetch_status(state="error", message=msg, finished_at_utc=_now_utc_iso())
         raise
     finally:
+        QUEUE_DEPTH.set(0, queue="fetch")
         db.close()
+        writer_job_lock.release()
 
 
 if __name__ == "__main__":
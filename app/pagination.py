@@ -0,0 +1,105 @@
+# app/pagination.py - keyset (cursor) pagination for article lists
+
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Article
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Every ordering ends in (published_at, id), so each row has exactly one place in it;
+# published_at is always set on write.
+# A leading column may be NULL; SQLite sorts NULLs last under DESC, so they form a final segment.
+SUMMARY_SORT_KEYS = {
+    "newest": None,
+    "priority": Article.impact_rank,
+    "confidence": Article.confidence_score,
+}
+
+
+# JSON types a cursor's lead value may have for each sort (None is always allowed).
+_SORT_KEY_TYPES = {
+    "newest": (),
+    "priority": (int,),
+    "confidence": (int, float),
+}
+# SQLite integers are signed 64-bit.
+_SQLITE_INT_RANGE = range(-(2**63), 2**63)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def summary_ordering(sort: str) -> tuple:
+    lead = SUMMARY_SORT_KEYS[sort]
+    tail = (Article.published_at.desc(), Article.id.desc())
+    return tail if lead is None else (lead.desc(), *tail)
+
+
+def encode_cursor(sort: str, article) -> str:
+    lead = SUMMARY_SORT_KEYS[sort]
+    payload = {
+        "s": sort,
+        "k": [getattr(article, lead.key) if lead is not None else None, article.published_at.isoformat(), article.id],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        lead_value, published_at, article_id = payload["k"]
+        cursor_sort = payload["s"]
+        published_at = datetime.fromisoformat(published_at)
+        article_id = int(article_id)
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Malformed pagination cursor.") from exc
+    if cursor_sort != sort:
+        raise InvalidCursorError(f"Cursor was issued for sort={cursor_sort}, not sort={sort}.")
+    if lead_value is not None:
+        # bool is an int subclass, and NaN/Infinity are valid to json.loads; none of them bind cleanly.
+        if isinstance(lead_value, bool) or not isinstance(lead_value, _SORT_KEY_TYPES[sort]):
+            raise InvalidCursorError("Malformed pagination cursor.")
+        if isinstance(lead_value, float) and not math.isfinite(lead_value):
+            raise InvalidCursorError("Malformed pagination cursor.")
+        if isinstance(lead_value, int) and lead_value not in _SQLITE_INT_RANGE:
+            raise InvalidCursorError("Malformed pagination cursor.")
+    if article_id not in _SQLITE_INT_RANGE:
+        raise InvalidCursorError("Malformed pagination cursor.")
+    return lead_value, published_at, article_id
+
+
+async def fetch_page(db: AsyncSession, statement, sort: str, limit: int, cursor: str | None = None) -> tuple[list, str | None]:
+    # Returns one page of `statement` in `sort` order and the cursor for the next one (None on the last page).
+    # Each page is an index range seek from the cursor, so page N costs the same as page 1.
+    lead = SUMMARY_SORT_KEYS[sort]
+    ordered = statement.order_by(*summary_ordering(sort))
+
+    async def _rows(page_statement, count: int) -> list:
+        return list((await db.execute(page_statement.limit(count))).all())
+
+    if cursor is None:
+        rows = await _rows(ordered, limit + 1)
+    else:
+        lead_value, published_at, article_id = decode_cursor(cursor, sort)
+        tail = tuple_(Article.published_at, Article.id) < tuple_(published_at, article_id)
+        if lead is None:
+            rows = await _rows(ordered.where(tail), limit + 1)
+        elif lead_value is None:
+            rows = await _rows(ordered.where(lead.is_(None), tail), limit + 1)
+        else:
+            key = tuple_(lead, Article.published_at, Article.id) < tuple_(lead_value, published_at, article_id)
+            rows = await _rows(ordered.where(key), limit + 1)
+            if len(rows) <= limit:
+                # Past the last non-NULL lead value: continue into the NULL segment.
+                rows += await _rows(ordered.where(lead.is_(None)), limit + 1 - len(rows))
+    next_cursor = encode_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,105 @@
+# app/response_cache.py - bounded LRU/TTL cache of serialized API responses
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.metrics import record_cache_lookup
+
+RESPONSE_CACHE_MAX_BYTES = int(float(os.getenv("AIDA_RESPONSE_CACHE_MB", "64")) * 1024 * 1024)
+RESPONSE_CACHE_TTL_S = float(os.getenv("AIDA_RESPONSE_CACHE_TTL_S", "600"))
+# One response may take at most this share of the budget, so a single huge query cannot flush the rest.
+_MAX_ENTRY_SHARE = 0.25
+
+
+class ResponseCache:
+    # Entries are tagged with the data version (the ETag) they were built from. The first lookup
+    # that sees a newer version drops everything, so a committed write from any process invalidates
+    # the cache exactly once and stale bytes are never served.
+
+    def __init__(self, name: str, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl_s: float = RESPONSE_CACHE_TTL_S):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0, "invalidations": 0, "too_large": 0}
+
+    def _switch_version(self, version) -> None:
+        if version == self._version:
+            return
+        if self._entries:
+            self._stats["invalidations"] += 1
+        self._entries.clear()
+        self._bytes = 0
+        self._version = version
+
+    def _drop(self, key) -> None:
+        _, body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, key, version) -> tuple[bytes, dict] | None:
+        with self._lock:
+            self._switch_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                record_cache_lookup(self.name, False)
+                return None
+            stored_at, body, headers = entry
+            if time.monotonic() - stored_at > self.ttl_s:
+                self._drop(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                record_cache_lookup(self.name, False)
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            record_cache_lookup(self.name, True)
+            return body, headers
+
+    def put(self, key, version, body: bytes, headers: dict | None = None) -> None:
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                # Built from a version the cache has already moved past; never mix versions.
+                return
+            if len(body) > self.max_bytes * _MAX_ENTRY_SHARE:
+                self._stats["too_large"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), body, dict(headers or {}))
+            self._bytes += len(body)
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                ttl_s=self.ttl_s,
+                hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else None,
+            )
+
+
+def cache_key(path: str, query_items) -> tuple:
+    # Parameter order does not change the result, so it does not change the key.
+    return path, tuple(sorted(query_items))
+
+
+summaries_cache = ResponseCache("summaries")
@@ -0,0 +1,173 @@
+# app/retention.py - move old articles into an archive database and compact the live one
+
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.db import engine, writer_job_lock
+from app.migrations import add_missing_columns, backfill_typed_fields
+from app.models import Article, ArchiveBase, ArchivedArticle
+
+# Articles older than this move to the archive; 0 disables the job.
+RETENTION_DAYS = int(os.getenv("AIDA_RETENTION_DAYS", "30"))
+ARCHIVE_DB_PATH = os.getenv("AIDA_ARCHIVE_DB_PATH", "./aida_archive.db")
+# Daily run time (local clock, HH:MM), picked to stay clear of the two-hourly fetch.
+RETENTION_RUN_AT = os.getenv("AIDA_RETENTION_RUN_AT", "03:30")
+_BATCH_SIZE = 500
+# Pages released per incremental_vacuum step; each step is its own short write.
+_VACUUM_STEP_PAGES = 2000
+
+archive_engine = create_engine(f"sqlite:///{ARCHIVE_DB_PATH}", connect_args={"check_same_thread": False})
+ArchiveSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=archive_engine)
+
+
+def _ensure_archive_schema() -> None:
+    # The archive is not in the versioned migration chain; bring older files up to the model.
+    ArchiveBase.metadata.create_all(bind=archive_engine)
+    added = add_missing_columns(archive_engine, ArchivedArticle.__table__)
+    if {"confidence_score", "impact_rank", "sentiment_bucket"} & set(added):
+        with archive_engine.begin() as conn:
+            backfill_typed_fields(conn, "articles_archive")
+
+
+_ensure_archive_schema()
+
+# The live id is not copied: articles.id has no AUTOINCREMENT, so ids come back once the live
+# table empties, and the archive numbers its rows itself.
+_ARCHIVE_COLUMNS = [column.name for column in Article.__table__.columns if column.name != "id"]
+# How SQLAlchemy stores DateTime in SQLite, so raw SQL compares like the ORM does.
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+_retention_lock = threading.Lock()
+_retention_status = {
+    "state": "idle",
+    "retention_days": RETENTION_DAYS,
+    "last_run_utc": None,
+    "last_cutoff_utc": None,
+    "last_archived": 0,
+    "total_archived": 0,
+    "last_pages_freed": 0,
+    "message": None,
+}
+
+
+def _set_retention_status(**updates) -> None:
+    with _retention_lock:
+        _retention_status.update(updates)
+
+
+def get_retention_status() -> dict:
+    with _retention_lock:
+        return dict(_retention_status)
+
+
+def archived_urls(urls: list[str]) -> set[str]:
+    if not urls:
+        return set()
+    db = ArchiveSessionLocal()
+    try:
+        return {row[0] for row in db.query(ArchivedArticle.url).filter(ArchivedArticle.url.in_(urls)).all()}
+    finally:
+        db.close()
+
+
+def _archive_batches(conn, cutoff: datetime) -> int:
+    columns = ", ".join(_ARCHIVE_COLUMNS)
+    updates = ", ".join(f"{name} = excluded.{name}" for name in _ARCHIVE_COLUMNS + ["archived_at"])
+    moved = 0
+    while True:
+        ids = [
+            row[0]
+            for row in conn.execute(
+                text("SELECT id FROM main.articles WHERE published_at < :cutoff ORDER BY published_at, id LIMIT :limit"),
+                {"cutoff": cutoff.strftime(_SQLITE_DATETIME_FORMAT), "limit": _BATCH_SIZE},
+            ).fetchall()
+        ]
+        if not ids:
+            return moved
+        id_list = ", ".join(str(int(article_id)) for article_id in ids)
+        # Copy then delete in one transaction. A url that is already archived (a retried batch, or an
+        # article stored again later) takes the newer copy. "WHERE true" lets SQLite parse the upsert.
+        conn.execute(text(
+            f"INSERT INTO archive.articles_archive ({columns}, archived_at) "
+            f"SELECT {columns}, :archived_at FROM main.articles WHERE id IN ({id_list}) AND true "
+            f"ON CONFLICT(url) DO UPDATE SET {updates}"
+        ), {"archived_at": datetime.utcnow().strftime(_SQLITE_DATETIME_FORMAT)})
+        # Only rows now in the archive leave the live table.
+        archived = f"id IN ({id_list}) AND url IN (SELECT url FROM archive.articles_archive)"
+        # Stored full text is only kept for live articles; foreign keys are not enforced, so delete it here.
+        conn.execute(text(
+            f"DELETE FROM main.article_content WHERE article_id IN (SELECT id FROM main.articles WHERE {archived})"
+        ))
+        deleted = conn.execute(text(f"DELETE FROM main.articles WHERE {archived}")).rowcount
+        conn.commit()
+        if deleted < len(ids):
+            # Never loops on the same rows: whatever stayed behind is reported and left for the next run.
+            print(f"Retention kept {len(ids) - deleted} articles that could not be archived.")
+            return moved + deleted
+        moved += deleted
+        print(f"Archived {moved} articles so far...")
+
+
+def _compact(conn) -> int:
+    # VACUUM and the auto_vacuum switch cannot run inside a transaction.
+    if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        print("Switching the live database to incremental auto-vacuum (one-time full VACUUM)...")
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+        conn.commit()
+    freed = 0
+    while True:
+        free_pages = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+        if not free_pages:
+            break
+        step = min(free_pages, _VACUUM_STEP_PAGES)
+        # sqlite3's execute() steps a row-less PRAGMA once, which frees a single page;
+        # executescript() runs it to completion.
+        conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({step});")
+        freed += step
+    if conn.execute(text("PRAGMA journal_mode")).scalar() == "wal":
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).fetchall()
+    conn.commit()
+    return freed
+
+
+def run_retention(now: datetime | None = None) -> dict:
+    if RETENTION_DAYS <= 0:
+        _set_retention_status(state="disabled", message="AIDA_RETENTION_DAYS is 0.")
+        return get_retention_status()
+    now = now or datetime.now(timezone.utc)
+    # published_at is stored as naive UTC.
+    cutoff = now.astimezone(timezone.utc).replace(tzinfo=None) - timedelta(days=RETENTION_DAYS)
+    _set_retention_status(state="running", message=f"Archiving articles published before {cutoff.isoformat()}")
+    try:
+        # Queues behind a running fetch or backfill chunk rather than racing it for the writer.
+        with writer_job_lock, engine.connect() as conn:
+            conn.execute(text("ATTACH DATABASE :path AS archive"), {"path": os.path.abspath(ARCHIVE_DB_PATH)})
+            conn.commit()
+            try:
+                moved = _archive_batches(conn, cutoff)
+            finally:
+                conn.commit()
+                conn.execute(text("DETACH DATABASE archive"))
+                conn.commit()
+            freed = _compact(conn) if moved else 0
+    except Exception as exc:
+        msg = f"Retention run failed: {exc}"
+        print(msg)
+        _set_retention_status(state="error", message=msg, last_run_utc=now.isoformat())
+        raise
+    message = f"Archived {moved} articles, freed {freed} pages."
+    print(message)
+    with _retention_lock:
+        _retention_status.update(
+            state="idle",
+            message=message,
+            last_run_utc=now.isoformat(),
+            last_cutoff_utc=cutoff.isoformat(),
+            last_archived=moved,
+            last_pages_freed=freed,
+        )
+        _retention_status["total_archived"] += moved
+        return dict(_retention_status)
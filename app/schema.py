@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ArticleOut(BaseModel):
@@ -17,6 +17,39 @@ class ArticleOut(BaseModel):
     category: str
     country: str
     published_at: datetime
+    confidence_score: Optional[float] = None
+    impact_rank: Optional[int] = None
+    sentiment_bucket: Optional[int] = None
 
     class Config:
         from_attributes = True
+
+
+class SearchHit(BaseModel):
+    article: ArticleOut
+    score: float
+    # HTML: escaped article text with <mark> around the matched terms.
+    title_snippet: str
+    summary_snippet: str
+
+
+class SearchResults(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[SearchHit]
+
+
+class PriorityCounts(BaseModel):
+    total: int
+    impact_level: dict[str, int]
+    sentiment: dict[str, int]
+
+
+class Facets(BaseModel):
+    category: dict[str, int]
+    source: dict[str, int]
+    country: dict[str, int]
+    impact_level: dict[str, int]
+    date: dict[str, int]
@@ -0,0 +1,131 @@
+# app/search.py - ranked full-text search over the articles_fts index
+
+import html
+import re
+from sqlalchemy import Integer, and_, column, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Article
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Private-use characters mark the hits inside snippet(), so the article text can be
+# HTML-escaped before the real <mark> tags go in.
+_SNIPPET_START = "\ue000"
+_SNIPPET_END = "\ue001"
+# bm25 column weights: a hit in the title counts for more than one in the summary.
+_TITLE_WEIGHT = 10.0
+_SUMMARY_WEIGHT = 1.0
+_TITLE_SNIPPET_TOKENS = 16
+_SUMMARY_SNIPPET_TOKENS = 32
+
+# "quoted phrases", prefix* terms, plain words, and the OR/NOT operators.
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+
+def _highlight(snippet: str | None) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_SNIPPET_START, HIGHLIGHT_START).replace(_SNIPPET_END, HIGHLIGHT_END)
+
+
+class SearchQueryError(ValueError):
+    pass
+
+
+class SearchUnavailableError(RuntimeError):
+    pass
+
+
+def build_fts_query(raw: str, prefix_all: bool = False) -> str:
+    # Turns user input into a safe FTS5 MATCH expression. Terms are ANDed; every word is
+    # quoted so punctuation and column names in user input are never parsed as syntax.
+    # prefix_all makes every bare word a prefix match, like a search-as-you-type box.
+    parts = []
+    for phrase, word in _QUERY_TOKEN_RE.findall(raw or ""):
+        if phrase:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+            continue
+        if word in ("OR", "NOT") and parts and parts[-1] not in ("OR", "NOT"):
+            parts.append(word)
+            continue
+        terms = _WORD_RE.findall(word)
+        for index, term in enumerate(terms):
+            is_prefix = prefix_all or (word.endswith("*") and index == len(terms) - 1)
+            parts.append(f'"{term}"*' if is_prefix else f'"{term}"')
+    while parts and parts[-1] in ("OR", "NOT"):
+        parts.pop()
+    if not parts:
+        raise SearchQueryError("Search query has no searchable words.")
+    return " ".join(parts)
+
+
+def has_search_words(raw: str | None) -> bool:
+    return bool(_WORD_RE.search(raw or ""))
+
+
+async def fts_available(db: AsyncSession) -> bool:
+    result = await db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"))
+    return result.first() is not None
+
+
+def keyword_clause(raw: str, fts: bool = True):
+    # WHERE clause for a keyword filter on /summaries: an FTS5 rowid lookup, or LIKE when
+    # the index is missing (SQLite built without FTS5).
+    match = build_fts_query(raw, prefix_all=True)
+    if fts:
+        matches = text("SELECT rowid FROM articles_fts WHERE articles_fts MATCH :keyword_match")
+        return Article.id.in_(matches.bindparams(keyword_match=match).columns(column("rowid", Integer)))
+    words = _WORD_RE.findall(raw)
+    return and_(*(or_(Article.title.ilike(f"%{word}%"), Article.summary.ilike(f"%{word}%")) for word in words))
+
+
+async def search_articles(db: AsyncSession, raw_query: str, limit: int, offset: int) -> tuple[int, list[dict]]:
+    match = build_fts_query(raw_query)
+    try:
+        total = (await db.execute(
+            text("SELECT count(*) FROM articles_fts WHERE articles_fts MATCH :match"),
+            {"match": match},
+        )).scalar()
+        rows = (await db.execute(
+            text(
+                "SELECT rowid, bm25(articles_fts, :title_weight, :summary_weight) AS rank, "
+                "snippet(articles_fts, 0, :start, :end, '…', :title_tokens) AS title_snippet, "
+                "snippet(articles_fts, 1, :start, :end, '…', :summary_tokens) AS summary_snippet "
+                "FROM articles_fts WHERE articles_fts MATCH :match "
+                "ORDER BY rank LIMIT :limit OFFSET :offset"
+            ),
+            {
+                "match": match,
+                "title_weight": _TITLE_WEIGHT,
+                "summary_weight": _SUMMARY_WEIGHT,
+                "start": _SNIPPET_START,
+                "end": _SNIPPET_END,
+                "title_tokens": _TITLE_SNIPPET_TOKENS,
+                "summary_tokens": _SUMMARY_SNIPPET_TOKENS,
+                "limit": limit,
+                "offset": offset,
+            },
+        )).fetchall()
+    except OperationalError as exc:
+        if "no such table" in str(exc).lower():
+            raise SearchUnavailableError("Full-text index is not available in this database.") from exc
+        raise SearchQueryError(f"Invalid search query: {raw_query}") from exc
+
+    found = await db.execute(select(Article).where(Article.id.in_([row.rowid for row in rows])))
+    articles = {article.id: article for article in found.scalars().all()}
+    hits = []
+    for row in rows:
+        article = articles.get(row.rowid)
+        if article is None:
+            continue
+        hits.append({
+            "article": article,
+            # bm25 is lower-is-better; flip it so clients can sort by score descending.
+            "score": round(-row.rank, 4),
+            "title_snippet": _highlight(row.title_snippet),
+            "summary_snippet": _highlight(row.summary_snippet),
+        })
+    return total, hits
@@ -1,11 +1,22 @@
-﻿from groq import Groq
-import os
+﻿from app.groq_pool import GroqKeyPool, get_key_pool, groq_keys_from_env
+from app.llm_circuit import LLMCircuitOpenError, check_llm_circuit, record_llm_failure, record_llm_success, release_llm_probe
+from app.budget import ArticleBudget, BudgetExhaustedError
+from app.local_sentiment import score_sentiment
+from app.text_analysis import TextAnalysis
+from app.article_fields import normalize_impact_level
+from app.metrics import LLM_RATE_LIMIT_WAIT_SECONDS, record_cache_lookup, record_stage_result
 import json
 import re
 import time
 
-GROQ_SENTIMENT_API_KEY = os.getenv("GROQ_SENTIMENT_API_KEY") or os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_SENTIMENT_API_KEY) if GROQ_SENTIMENT_API_KEY else None
+# Per-key budgets for llama-3.1-8b-instant; extra keys go in GROQ_SENTIMENT_API_KEYS.
+_GROQ_KEY_RPM = 30
+_GROQ_KEY_TPM = 6000
+_GROQ_KEY_RPD = 14400
+GROQ_SENTIMENT_API_KEYS = groq_keys_from_env("GROQ_SENTIMENT_API_KEY") or groq_keys_from_env("GROQ_API_KEY")
+groq_pool = get_key_pool(
+    "sentiment", GROQ_SENTIMENT_API_KEYS, rpm=_GROQ_KEY_RPM, tpm=_GROQ_KEY_TPM, rpd=_GROQ_KEY_RPD
+)
 
 _sentiment_cache = {}
 
@@ -13,16 +24,12 @@ _RATE_LIMIT_RE = re.compile(r"try again in ([0-9.]+)s", re.IGNORECASE)
 _RETRY_BUFFER_S = 3.0
 _DEFAULT_RETRY_S = 2.0
 _MAX_RETRIES = 20
+_MIN_LLM_BUDGET_S = 3.0
 USE_KEYWORD_FILTER = True
 _MIN_FILTER_CHARS = 280
 _MAX_LLM_INPUT_CHARS = 1200
+USE_LOCAL_FALLBACK = True
 
-_STOPWORDS = {
-    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
-    "he", "in", "is", "it", "its", "of", "on", "that", "the", "to", "was",
-    "were", "will", "with", "you", "your", "they", "their", "them", "this",
-    "these", "those", "or", "but", "not", "have", "had", "been", "if",
-}
 
 def _retry_after_s(exc: Exception) -> float | None:
     response = getattr(exc, "response", None)
@@ -64,11 +71,18 @@ def _is_tpm_rate_limit(exc: Exception) -> bool:
         return True
     return False
 
-def _call_groq_with_retry(client: Groq, **kwargs):
+def _call_groq_with_retry(pool: GroqKeyPool, budget: ArticleBudget | None = None, **kwargs):
+    is_probe = check_llm_circuit("LLM sentiment")
     total_attempts = max(_MAX_RETRIES, 1)
     for attempt in range(total_attempts):
+        if budget is not None:
+            if not budget.allows(_MIN_LLM_BUDGET_S):
+                if is_probe:
+                    release_llm_probe()
+                raise BudgetExhaustedError("LLM sentiment skipped: article time budget exhausted.")
+            kwargs["timeout"] = budget.remaining_s()
         try:
-            return client.chat.completions.create(**kwargs)
+            response = pool.create(**kwargs)
         except Exception as exc:
             message = str(exc)
             is_rate_limit = "rate limit" in message.lower() or "429" in message
@@ -81,6 +95,11 @@ def _call_groq_with_retry(client: Groq, **kwargs):
                         if delay is None:
                             delay = _DEFAULT_RETRY_S
                         delay = delay + _RETRY_BUFFER_S
+                        if budget is not None and not budget.allows(delay + _MIN_LLM_BUDGET_S):
+                            print("LLM sentiment rate limited (TPM). Not enough time budget left to wait.")
+                            if is_probe:
+                                release_llm_probe()
+                            raise BudgetExhaustedError("LLM sentiment gave up: article time budget exhausted.") from exc
                         attempt_label = f"{attempt + 1}/{total_attempts}"
                         wait_start = time.perf_counter()
                         print(
@@ -89,66 +108,47 @@ def _call_groq_with_retry(client: Groq, **kwargs):
                         )
                         time.sleep(max(delay, 0.5))
                         waited = time.perf_counter() - wait_start
+                        LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, stage="sentiment")
                         print(f"LLM sentiment retry wait complete: {waited:.2f}s.")
                         continue
                     print("LLM sentiment rate limited (TPM). Retries exhausted.")
                 else:
                     print("LLM sentiment rate limited (RPD). Skipping retry.")
+            record_llm_failure(exc)
             raise
+        record_llm_success()
+        return response
 
-def _split_sentences(text: str) -> list[str]:
-    cleaned = " ".join(text.split())
-    if not cleaned:
-        return []
-    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z0-9])", cleaned)
-    return [part.strip() for part in parts if part.strip()]
-
-def _extract_keywords(sentences: list[str], top_n: int = 12) -> set[str]:
-    tokens = re.findall(r"[A-Za-z0-9']+", " ".join(sentences))
-    freq = {}
-    for token in tokens:
-        key = token.lower()
-        if key in _STOPWORDS:
-            continue
-        if len(key) < 3 and not key.isdigit():
-            continue
-        freq[key] = freq.get(key, 0) + 1
-    sorted_items = sorted(freq.items(), key=lambda item: item[1], reverse=True)
-    return {word for word, _ in sorted_items[:top_n]}
-
-def _select_summary_input(text: str, max_sentences: int = 4) -> str:
-    sentences = _split_sentences(text)
-    if len(sentences) <= max_sentences:
-        return text
-    keywords = _extract_keywords(sentences)
-    if not keywords:
-        return " ".join(sentences[:max_sentences])
-
-    def score(sentence: str) -> int:
-        words = set(re.findall(r"[A-Za-z0-9']+", sentence.lower()))
-        return len(words & keywords)
-
-    lead = sentences[:2]
-    tail = sorted(sentences[2:], key=lambda s: (score(s), len(s)), reverse=True)
-    selected = list(lead)
-    for sentence in tail:
-        if score(sentence) == 0:
-            continue
-        selected.append(sentence)
-        if len(selected) >= max_sentences:
-            break
-    if len(selected) < 3:
-        selected = sentences[:max_sentences]
-    selected_set = set(selected)
-    ordered = [sentence for sentence in sentences if sentence in selected_set]
-    return " ".join(ordered)
+def _local_sentiment(title: str, summary: str, why: str) -> tuple[str, str, str, str, str]:
+    # Not cached, so a later LLM pass can still replace it.
+    if not USE_LOCAL_FALLBACK:
+        record_stage_result("sentiment", "default")
+        return ("neutral", "neutral for general market", "0.00", "important", f"default: {why}")
+    try:
+        result = score_sentiment(title, summary)
+    except Exception as exc:
+        print(f"Local sentiment failed: {exc}")
+        record_stage_result("sentiment", "default")
+        return ("neutral", "neutral for general market", "0.00", "important", f"default: {why}")
+    print(f">>> LOCAL SENTIMENT (CPU, {why}) <<<")
+    record_stage_result("sentiment", "local")
+    return result
 
 
-def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, str]:
+def get_dual_sentiment(
+    title: str,
+    summary: str,
+    budget: ArticleBudget | None = None,
+    analysis: TextAnalysis | None = None,
+) -> tuple[str, str, str, str, str]:
     try:
-        combined = f"{(title or '').strip()}\n{(summary or '').strip()}".strip()
+        if analysis is None:
+            analysis = TextAnalysis(f"{title or ''} {summary or ''}")
+        combined = analysis.normalized
+        record_cache_lookup("sentiment", combined in _sentiment_cache)
         if combined in _sentiment_cache:
             print("LLM sentiment cache hit.")
+            record_stage_result("sentiment", "cache")
             cached = _sentiment_cache[combined]
             if isinstance(cached, tuple) and len(cached) == 4:
                 tone, impact, confidence, impact_level = cached
@@ -157,16 +157,19 @@ def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, st
 
         if not combined or len(combined) < 40:
             print("LLM sentiment skipped: text too short.")
+            record_stage_result("sentiment", "default")
             return ("neutral", "neutral for general market", "0.00", "important", "default: too little text")
-        if not groq_client:
-            print("LLM sentiment disabled: GROQ_SENTIMENT_API_KEY not set.")
-            return ("neutral", "neutral for general market", "0.00", "important", "default: LLM disabled")
+        if not groq_pool:
+            print("LLM sentiment disabled: GROQ_SENTIMENT_API_KEY not set, using local.")
+            return _local_sentiment(title, summary, "LLM disabled")
+        if budget is not None and not budget.allows(_MIN_LLM_BUDGET_S):
+            print("LLM sentiment skipped: article time budget low, using local.")
+            budget.mark_degraded("sentiment")
+            return _local_sentiment(title, summary, "time budget")
 
-        text_for_llm = " ".join(combined.split())
+        text_for_llm = combined
         if USE_KEYWORD_FILTER:
-            filtered = _select_summary_input(text_for_llm)
-            if len(filtered) >= _MIN_FILTER_CHARS:
-                text_for_llm = filtered
+            text_for_llm = analysis.filtered(4, _MIN_FILTER_CHARS)
 
         prompt = {
             "task": "Return JSON for tone, impact, confidence, impact_level, reason.",
@@ -193,7 +196,8 @@ def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, st
         }
 
         response = _call_groq_with_retry(
-            groq_client,
+            groq_pool,
+            budget=budget,
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a JSON API. Output JSON only."},
@@ -205,12 +209,13 @@ def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, st
 
         raw = response.choices[0].message.content.strip()
         if not raw:
-            print("LLM sentiment empty response, using defaults.")
-            return ("neutral", "neutral for general market", "0.00", "important", "default: empty response")
+            print("LLM sentiment empty response, using local.")
+            return _local_sentiment(title, summary, "empty response")
 
         tone, impact, confidence, impact_level, reason, parsed = _parse_sentiment_payload(raw)
         if parsed:
             print(">>> LLM SENTIMENT <<<")
+            record_stage_result("sentiment", "llm")
             _sentiment_cache[combined] = (tone, impact, confidence, impact_level, reason)
             return (tone, impact, confidence, impact_level, reason)
 
@@ -221,7 +226,8 @@ def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, st
         ] + prompt["rules"]
         try:
             response = _call_groq_with_retry(
-                groq_client,
+                groq_pool,
+                budget=budget,
                 model="llama-3.1-8b-instant",
                 messages=[
                     {"role": "system", "content": "You are a JSON API. Output JSON only."},
@@ -235,29 +241,26 @@ def get_dual_sentiment(title: str, summary: str) -> tuple[str, str, str, str, st
                 tone, impact, confidence, impact_level, reason, parsed = _parse_sentiment_payload(raw)
                 if parsed:
                     print(">>> LLM SENTIMENT (STRICT) <<<")
+                    record_stage_result("sentiment", "llm")
                     _sentiment_cache[combined] = (tone, impact, confidence, impact_level, reason)
                     return (tone, impact, confidence, impact_level, reason)
         except Exception as exc:
             print(f"LLM sentiment strict retry failed: {exc}")
 
-        print("LLM sentiment response unparseable, using defaults.")
-        return ("neutral", "neutral for general market", "0.00", "important", "default: unparseable response")
+        print("LLM sentiment response unparseable, using local.")
+        return _local_sentiment(title, summary, "unparseable response")
 
+    except BudgetExhaustedError as exc:
+        print(f"{exc} Using local.")
+        budget.mark_degraded("sentiment")
+        return _local_sentiment(title, summary, "time budget")
+    except LLMCircuitOpenError as exc:
+        print(f"{exc} Using local.")
+        return _local_sentiment(title, summary, "LLM circuit open")
     except Exception as e:
         print(f"Groq dual sentiment failed: {e}")
-        return ("neutral", "neutral for general market", "0.00", "important", "default: exception")
-
+        return _local_sentiment(title, summary, "exception")
 
-def _normalize_impact_level(value: str) -> str:
-    mapping = {
-        "high": "critical",
-        "medium": "important",
-        "low": "routine",
-        "critical": "critical",
-        "important": "important",
-        "routine": "routine",
-    }
-    return mapping.get(value.strip().lower(), "")
 
 def _parse_sentiment_payload(raw: str) -> tuple[str, str, str, str, str, bool]:
     default = ("neutral", "neutral for general market", "0.00", "important", "")
@@ -290,7 +293,7 @@ def _parse_sentiment_payload(raw: str) -> tuple[str, str, str, str, str, bool]:
             impact_level_raw = lowered.get("impact_level")
             if impact_level_raw is None and "priority" in lowered:
                 impact_level_raw = lowered.get("priority")
-            impact_level = _normalize_impact_level(str(impact_level_raw or default[3]))
+            impact_level = normalize_impact_level(str(impact_level_raw or default[3]))
             if impact_level not in {"critical", "important", "routine"}:
                 impact_level = default[3]
             parsed = any(
@@ -328,7 +331,7 @@ def _parse_sentiment_payload(raw: str) -> tuple[str, str, str, str, str, bool]:
         elif lower.startswith("reason:") or lower.startswith("rationale:"):
             reason = line.split(":", 1)[-1].strip()
             parsed = True
-    impact_level = _normalize_impact_level(impact_level or default[3])
+    impact_level = normalize_impact_level(impact_level or default[3])
     if impact_level not in {"critical", "important", "routine"}:
         impact_level = default[3]
     return (tone, impact, confidence, impact_level, reason, parsed)
@@ -0,0 +1,110 @@
+# app/serialization.py - column-tuple selection and direct JSON encoding for article lists
+
+import io
+import json
+from datetime import datetime
+from sqlalchemy import DateTime, Float, Integer
+from app.models import Article
+from app.schema import ArticleOut
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Same fields, in the same order, as the ArticleOut response model.
+ARTICLE_FIELDS = tuple(ArticleOut.model_fields)
+# Columns the cursor is built from; selected even when the client did not ask for them.
+_CURSOR_FIELDS = ("id", "published_at", "impact_rank", "confidence_score")
+
+
+class InvalidFieldsError(ValueError):
+    pass
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    if not fields:
+        return ARTICLE_FIELDS
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in ARTICLE_FIELDS]
+    if unknown or not requested:
+        raise InvalidFieldsError(f"Unknown fields {unknown}; choose from {', '.join(ARTICLE_FIELDS)}.")
+    return tuple(dict.fromkeys(requested))
+
+
+def article_columns(fields: tuple[str, ...]) -> list:
+    names = list(fields) + [name for name in _CURSOR_FIELDS if name not in fields]
+    return [getattr(Article, name) for name in names]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def rows_to_json(rows, fields: tuple[str, ...]) -> bytes:
+    # The selected tuples go straight to the encoder: no ORM identity map, no per-row model validation.
+    count = len(fields)
+    return dumps([dict(zip(fields, row[:count])) for row in rows])
+
+
+def _arrow_type(name: str):
+    column_type = getattr(Article, name).type
+    if isinstance(column_type, DateTime):
+        return pyarrow.timestamp("us")
+    if isinstance(column_type, Float):
+        return pyarrow.float64()
+    if isinstance(column_type, Integer):
+        return pyarrow.int64()
+    return pyarrow.string()
+
+
+def arrow_schema(fields: tuple[str, ...]):
+    return pyarrow.schema([(name, _arrow_type(name)) for name in fields])
+
+
+class ArrowStreamEncoder:
+    # Arrow IPC stream: schema first, then one record batch per encode() call, then an end marker.
+    # Clients read it column-wise (pyarrow.ipc.open_stream(...).read_pandas()) without parsing rows.
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.fields = fields
+        self.schema = arrow_schema(fields)
+        self._sink = io.BytesIO()
+        self._writer = pyarrow.ipc.new_stream(self._sink, self.schema)
+
+    def _take(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def encode(self, rows) -> bytes:
+        if rows:
+            columns = list(zip(*rows))
+            arrays = [pyarrow.array(columns[index], type=field.type) for index, field in enumerate(self.schema)]
+            self._writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._take()
+
+
+def rows_to_arrow(rows, fields: tuple[str, ...]) -> bytes:
+    encoder = ArrowStreamEncoder(fields)
+    return encoder.encode(rows) + encoder.close()
@@ -1,10 +1,15 @@
 ﻿from transformers import BartTokenizer, pipeline
-from groq import Groq
+from app.groq_pool import GroqKeyPool, get_key_pool, groq_keys_from_env
+from app.llm_circuit import check_llm_circuit, record_llm_failure, record_llm_success, release_llm_probe
+from app.hedging import HedgeCancelledError, run_hedged
+from app.budget import ArticleBudget, BudgetExhaustedError
+from app.text_analysis import TextAnalysis
+from app.metrics import LLM_RATE_LIMIT_WAIT_SECONDS, record_stage_result
 import os
 import json
 import re
+import threading
 import time
-from collections import Counter
 
 # Load tokenizer first
 tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
@@ -16,16 +21,27 @@ summarizer = pipeline(
     device=-1
 )
 
-GROQ_SUMMARIZER_API_KEY = os.getenv("GROQ_SUMMARIZER_API_KEY")
-_groq_client = Groq(api_key=GROQ_SUMMARIZER_API_KEY) if GROQ_SUMMARIZER_API_KEY else None
+# Per-key budgets for groq/compound-mini; extra keys go in GROQ_SUMMARIZER_API_KEYS.
+_GROQ_KEY_RPM = 30
+_GROQ_KEY_TPM = 70000
+_GROQ_KEY_RPD = 250
+GROQ_SUMMARIZER_API_KEYS = groq_keys_from_env("GROQ_SUMMARIZER_API_KEY")
+_groq_pool = get_key_pool(
+    "summarizer", GROQ_SUMMARIZER_API_KEYS, rpm=_GROQ_KEY_RPM, tpm=_GROQ_KEY_TPM, rpd=_GROQ_KEY_RPD
+)
 
 USE_KEYWORD_FILTER = True
 _MIN_FILTER_CHARS = 280
+# Race the LLM against BART once it runs past the observed p90 latency.
+USE_HEDGING = os.getenv("AIDA_USE_HEDGING") == "1"
 
 _RATE_LIMIT_RE = re.compile(r"try again in ([0-9.]+)s", re.IGNORECASE)
 _RETRY_BUFFER_S = 2.0
 _DEFAULT_RETRY_S = 2.0
 _MAX_RETRIES = 20
+_MIN_LLM_BUDGET_S = 3.0
+# Time a CPU BART summary needs; with less left, fall back to an extractive summary.
+_LOCAL_SUMMARY_RESERVE_S = 12.0
 
 def _retry_after_s(exc: Exception) -> float | None:
     response = getattr(exc, "response", None)
@@ -67,11 +83,27 @@ def _is_tpm_rate_limit(exc: Exception) -> bool:
         return True
     return False
 
-def _call_groq_with_retry(client: Groq, **kwargs):
+def _call_groq_with_retry(
+    pool: GroqKeyPool,
+    cancel_event: threading.Event | None = None,
+    budget: ArticleBudget | None = None,
+    **kwargs,
+):
+    is_probe = check_llm_circuit("LLM summarizer")
     total_attempts = max(_MAX_RETRIES, 1)
     for attempt in range(total_attempts):
+        if cancel_event is not None and cancel_event.is_set():
+            if is_probe:
+                release_llm_probe()
+            raise HedgeCancelledError("LLM summarizer canceled: local summary won the hedge.")
+        if budget is not None:
+            if not budget.allows(_MIN_LLM_BUDGET_S):
+                if is_probe:
+                    release_llm_probe()
+                raise BudgetExhaustedError("LLM summarizer skipped: article time budget exhausted.")
+            kwargs["timeout"] = budget.remaining_s()
         try:
-            return client.chat.completions.create(**kwargs)
+            response = pool.create(**kwargs)
         except Exception as exc:
             message = str(exc)
             is_rate_limit = "rate limit" in message.lower() or "429" in message
@@ -84,84 +116,45 @@ def _call_groq_with_retry(client: Groq, **kwargs):
                         if delay is None:
                             delay = _DEFAULT_RETRY_S
                         delay = delay + _RETRY_BUFFER_S
+                        if budget is not None and not budget.allows(delay + _MIN_LLM_BUDGET_S):
+                            print("LLM summarizer rate limited (TPM). Not enough time budget left to wait.")
+                            if is_probe:
+                                release_llm_probe()
+                            raise BudgetExhaustedError("LLM summarizer gave up: article time budget exhausted.") from exc
                         attempt_label = f"{attempt + 1}/{total_attempts}"
                         wait_start = time.perf_counter()
                         print(
                             "LLM summarizer rate limited (TPM). "
                             f"Retrying in {delay:.2f}s (attempt {attempt_label})..."
                         )
-                        time.sleep(max(delay, 0.5))
+                        if cancel_event is not None:
+                            cancel_event.wait(max(delay, 0.5))
+                        else:
+                            time.sleep(max(delay, 0.5))
                         waited = time.perf_counter() - wait_start
+                        LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, stage="summarize")
                         print(f"LLM summarizer retry wait complete: {waited:.2f}s.")
                         continue
                     print("LLM summarizer rate limited (TPM). Retries exhausted.")
                 else:
                     print("LLM summarizer rate limited (RPD). Skipping retry.")
+            record_llm_failure(exc)
             raise
+        record_llm_success()
+        return response
 
-_STOPWORDS = {
-    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
-    "he", "in", "is", "it", "its", "of", "on", "that", "the", "to", "was",
-    "were", "will", "with", "you", "your", "they", "their", "them", "this",
-    "these", "those", "or", "but", "not", "have", "had", "been", "if",
-}
-
-def _split_sentences(text: str) -> list[str]:
-    cleaned = " ".join(text.split())
-    if not cleaned:
-        return []
-    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z0-9])", cleaned)
-    return [part.strip() for part in parts if part.strip()]
-
-def _extract_keywords(sentences: list[str], top_n: int = 12) -> set[str]:
-    tokens = re.findall(r"[A-Za-z0-9']+", " ".join(sentences))
-    freq = Counter()
-    for token in tokens:
-        key = token.lower()
-        if key in _STOPWORDS:
-            continue
-        if len(key) < 3 and not key.isdigit():
-            continue
-        freq[key] += 1
-    return {word for word, _ in freq.most_common(top_n)}
-
-def _select_summary_input(text: str) -> str:
-    sentences = _split_sentences(text)
-    if len(sentences) <= 3:
-        return text
-    keywords = _extract_keywords(sentences)
-    if not keywords:
-        return " ".join(sentences[:5])
-
-    def score(sentence: str) -> int:
-        words = set(re.findall(r"[A-Za-z0-9']+", sentence.lower()))
-        return len(words & keywords)
-
-    lead = sentences[:2]
-    tail = sorted(sentences[2:], key=lambda s: (score(s), len(s)), reverse=True)
-    selected = list(lead)
-    for sentence in tail:
-        if score(sentence) == 0:
-            continue
-        selected.append(sentence)
-        if len(selected) >= 5:
-            break
-    if len(selected) < 3:
-        selected = sentences[:5]
-    selected_set = set(selected)
-    ordered = [sentence for sentence in sentences if sentence in selected_set]
-    return " ".join(ordered)
-
-def _llm_summary(text: str) -> str | None:
-    if not _groq_client:
+def _llm_summary(
+    analysis: TextAnalysis,
+    cancel_event: threading.Event | None = None,
+    budget: ArticleBudget | None = None,
+) -> str | None:
+    if not _groq_pool:
         print("LLM summarizer disabled: GROQ_SUMMARIZER_API_KEY not set.")
         return None
     try:
-        clean_text = " ".join(text.split())
+        clean_text = analysis.normalized
         if USE_KEYWORD_FILTER:
-            filtered = _select_summary_input(clean_text)
-            if len(filtered) >= _MIN_FILTER_CHARS:
-                clean_text = filtered
+            clean_text = analysis.filtered(5, _MIN_FILTER_CHARS, passthrough_at=3)
         prompt = {
             "task": "Summarize the news article in 2-3 sentences max.",
             "rules": [
@@ -175,7 +168,9 @@ def _llm_summary(text: str) -> str | None:
         }
 
         response = _call_groq_with_retry(
-            _groq_client,
+            _groq_pool,
+            cancel_event=cancel_event,
+            budget=budget,
             model="groq/compound-mini",
             messages=[{"role": "user", "content": json.dumps(prompt)}],
             temperature=0.2,
@@ -192,6 +187,8 @@ def _llm_summary(text: str) -> str | None:
         return None
     except Exception as exc:
         print(f"LLM summarization failed, using local: {exc}")
+        if isinstance(exc, BudgetExhaustedError) and budget is not None:
+            budget.mark_degraded("summary")
         return None
 
 def _parse_llm_summary(raw: str) -> str | None:
@@ -230,38 +227,88 @@ def _limit_sentences(text: str, max_sentences: int) -> str:
     return " ".join(sentences[:max_sentences]).strip()
 
 
-def generate_summary(text: str) -> str:
-    try:
-        if not text or len(text.strip()) < 30:
-            print("LLM summarizer skipped: text too short.")
-            return text
+def _local_summary(clean_text: str) -> str:
+    print(">>> LOCAL SUMMARIZER (CPU, TOKEN-SAFE) <<<")
 
-        clean_text = text.strip()
-        llm_summary = _llm_summary(clean_text)
-        if llm_summary:
-            print(">>> LLM SUMMARIZER <<<")
-            return llm_summary
+    # STEP 1: tokenize
+    tokens = tokenizer.encode(clean_text, truncation=False)
 
-        print(">>> LOCAL SUMMARIZER (CPU, TOKEN-SAFE) <<<")
+    # STEP 2: truncate tokens if necessary
+    MAX_ALLOWED = 900  # safe number for BART (below 1024)
+    if len(tokens) > MAX_ALLOWED:
+        tokens = tokens[:MAX_ALLOWED]
+        clean_text = tokenizer.decode(tokens, skip_special_tokens=True)
 
-        # STEP 1: tokenize
-        tokens = tokenizer.encode(clean_text, truncation=False)
+    result = summarizer(
+        clean_text,
+        max_length=200,
+        min_length=80,
+        do_sample=False,
+    )
 
-        # STEP 2: truncate tokens if necessary
-        MAX_ALLOWED = 900  # safe number for BART (below 1024)
-        if len(tokens) > MAX_ALLOWED:
-            tokens = tokens[:MAX_ALLOWED]
-            clean_text = tokenizer.decode(tokens, skip_special_tokens=True)
+    return result[0]["summary_text"].strip()
 
-        result = summarizer(
-            clean_text,
-            max_length=200,
-            min_length=80,
-            do_sample=False,
-        )
 
-        return result[0]["summary_text"].strip()
+def _record_source(budget: ArticleBudget | None, source: str) -> None:
+    record_stage_result("summarize", source)
+    if budget is not None:
+        budget.record_source("summary", source)
+
+
+def _extractive_summary(analysis: TextAnalysis, budget: ArticleBudget | None) -> str:
+    print(">>> EXTRACTIVE SUMMARIZER (TIME BUDGET) <<<")
+    _record_source(budget, "extractive")
+    return _limit_sentences(analysis.excerpt(5, passthrough_at=3), 3)
+
+
+def generate_summary(
+    text: str,
+    budget: ArticleBudget | None = None,
+    analysis: TextAnalysis | None = None,
+) -> str:
+    try:
+        if analysis is None:
+            analysis = TextAnalysis(text)
+        clean_text = analysis.normalized
+        if len(clean_text) < 30:
+            print("LLM summarizer skipped: text too short.")
+            _record_source(budget, "default")
+            return text
+
+        if budget is not None and not budget.allows(_LOCAL_SUMMARY_RESERVE_S):
+            budget.mark_degraded("summary")
+            return _extractive_summary(analysis, budget)
+        # The LLM may only spend what is left after keeping enough back for BART.
+        llm_budget = budget.reserving(_LOCAL_SUMMARY_RESERVE_S) if budget is not None else None
+        if USE_HEDGING and _groq_pool:
+            summary, winner = run_hedged(
+                "summary",
+                lambda cancel_event: _llm_summary(analysis, cancel_event=cancel_event, budget=llm_budget),
+                lambda cancel_event: _local_summary(clean_text),
+            )
+            if winner == "primary":
+                print(">>> LLM SUMMARIZER <<<")
+                _record_source(budget, "llm")
+                return summary
+            if winner == "hedge":
+                print(">>> LOCAL SUMMARIZER (HEDGE WON) <<<")
+                _record_source(budget, "local")
+                return summary
+        else:
+            llm_summary = _llm_summary(analysis, budget=llm_budget)
+            if llm_summary:
+                print(">>> LLM SUMMARIZER <<<")
+                _record_source(budget, "llm")
+                return llm_summary
+
+        if budget is not None and not budget.allows(_LOCAL_SUMMARY_RESERVE_S):
+            budget.mark_degraded("summary")
+            return _extractive_summary(analysis, budget)
+        summary = _local_summary(clean_text)
+        _record_source(budget, "local")
+        return summary
 
     except Exception as e:
         print(f"Summarization failed: {e}")
+        _record_source(budget, "default")
         return text
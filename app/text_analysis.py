@@ -0,0 +1,94 @@
+# app/text_analysis.py - per-article text analysis shared by the summary, sentiment and category stages
+
+from collections import Counter
+from functools import cached_property
+import re
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "he", "in", "is", "it", "its", "of", "on", "that", "the", "to", "was",
+    "were", "will", "with", "you", "your", "they", "their", "them", "this",
+    "these", "those", "or", "but", "not", "have", "had", "been", "if",
+})
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+_WORD_RE = re.compile(r"[A-Za-z0-9']+")
+_READ_MORE_RE = re.compile(r"(Read more.*?)(\.|\n|$)", re.IGNORECASE)
+_KEYWORD_COUNT = 12
+
+
+class TextAnalysis:
+    # Each property is computed on first use and memoized, so every stage reading the
+    # same article shares one normalization, one sentence split and one keyword pass.
+    def __init__(self, text: str | None, clean: bool = False):
+        self.raw = text or ""
+        # clean=True also strips "Read more ..." trailers from scraped article bodies.
+        self.clean = clean
+        self._excerpts: dict[tuple[int, int], str] = {}
+
+    @cached_property
+    def normalized(self) -> str:
+        text = " ".join(self.raw.split())
+        if self.clean:
+            text, removed = _READ_MORE_RE.subn("", text)
+            if removed:
+                text = " ".join(text.split())
+        return text
+
+    @cached_property
+    def sentences(self) -> list[str]:
+        if not self.normalized:
+            return []
+        parts = _SENTENCE_SPLIT_RE.split(self.normalized)
+        return [part.strip() for part in parts if part.strip()]
+
+    @cached_property
+    def sentence_words(self) -> list[frozenset[str]]:
+        return [frozenset(_WORD_RE.findall(sentence.lower())) for sentence in self.sentences]
+
+    @cached_property
+    def keywords(self) -> frozenset[str]:
+        freq = Counter()
+        for token in _WORD_RE.findall(self.normalized):
+            key = token.lower()
+            if key in _STOPWORDS:
+                continue
+            if len(key) < 3 and not key.isdigit():
+                continue
+            freq[key] += 1
+        return frozenset(word for word, _ in freq.most_common(_KEYWORD_COUNT))
+
+    def excerpt(self, max_sentences: int, passthrough_at: int | None = None) -> str:
+        # The lead two sentences plus the most keyword-dense others, kept in article order.
+        # Text with at most `passthrough_at` sentences (default: max_sentences) is returned whole.
+        if passthrough_at is None:
+            passthrough_at = max_sentences
+        key = (max_sentences, passthrough_at)
+        if key not in self._excerpts:
+            self._excerpts[key] = self._select(max_sentences, passthrough_at)
+        return self._excerpts[key]
+
+    def filtered(self, max_sentences: int, min_chars: int, passthrough_at: int | None = None) -> str:
+        # The excerpt when it keeps enough text to be useful, otherwise the whole normalized text.
+        excerpt = self.excerpt(max_sentences, passthrough_at)
+        return excerpt if len(excerpt) >= min_chars else self.normalized
+
+    def _select(self, max_sentences: int, passthrough_at: int) -> str:
+        sentences = self.sentences
+        if len(sentences) <= passthrough_at:
+            return self.normalized
+        keywords = self.keywords
+        if not keywords:
+            return " ".join(sentences[:max_sentences])
+
+        scores = [len(words & keywords) for words in self.sentence_words]
+        tail = sorted(range(2, len(sentences)), key=lambda i: (scores[i], len(sentences[i])), reverse=True)
+        selected = [0, 1]
+        for index in tail:
+            if scores[index] == 0:
+                continue
+            selected.append(index)
+            if len(selected) >= max_sentences:
+                break
+        if len(selected) < 3:
+            return " ".join(sentences[:max_sentences])
+        return " ".join(sentences[index] for index in sorted(selected))
@@ -0,0 +1,149 @@
+# Measure /summaries-style read latency while a simulated fetch keeps writing, with and without
+# the SQLite performance mode. Runs against a throwaway database, not aida.db.
+#
+#   python benchmarks/bench_db_reads.py --seed-rows 5000 --duration 20
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import create_engines
+from app.models import Article, Base
+
+
+def _article(index: int, started: datetime) -> Article:
+    return Article(
+        title=f"Benchmark headline {index}",
+        summary="Central bank holds rates steady as inflation cools. " * 6,
+        sentiment_emotional="neutral",
+        sentiment_contextual="neutral for economy",
+        sentiment_confidence="0.50",
+        impact_level="important",
+        impact_reason="benchmark row",
+        source=f"Source {index % 40}",
+        url=f"https://example.com/bench/{index}",
+        category=("economy", "politics", "technology", "sports")[index % 4],
+        country="US",
+        published_at=started - timedelta(minutes=index),
+    )
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _writer(Session, stop: threading.Event, batch: int, hold_s: float, counter: list[int], start_index: int) -> None:
+    # Mimics a fetch: a batch of inserts flushed inside one transaction that stays open
+    # while the next articles are enriched, then a single commit.
+    index = start_index
+    while not stop.is_set():
+        db = Session()
+        try:
+            for _ in range(batch):
+                db.add(_article(index, datetime.utcnow()))
+                index += 1
+                db.flush()
+            time.sleep(hold_s)
+            db.commit()
+            counter[0] += batch
+        except OperationalError as exc:
+            db.rollback()
+            print(f"writer error: {exc.orig}")
+        finally:
+            db.close()
+
+
+def _reader(Session, stop: threading.Event, latencies: list[float], errors: list[str], category: str | None) -> None:
+    while not stop.is_set():
+        db = Session()
+        started = time.perf_counter()
+        try:
+            query = db.query(Article)
+            if category:
+                query = query.filter(Article.category == category)
+            query.order_by(Article.published_at.desc()).all()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as exc:
+            errors.append(str(exc.orig))
+        finally:
+            db.close()
+        time.sleep(0.01)
+
+
+def run(perf_mode: bool, args) -> None:
+    workdir = tempfile.mkdtemp(prefix="aida-bench-")
+    url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    writer_engine, reader_engine = create_engines(url, perf_mode=perf_mode)
+    Base.metadata.create_all(bind=writer_engine)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
+
+    now = datetime.utcnow()
+    db = WriteSession()
+    db.add_all(_article(index, now) for index in range(args.seed_rows))
+    db.commit()
+    db.close()
+
+    stop = threading.Event()
+    written = [0]
+    latencies: list[float] = []
+    errors: list[str] = []
+    threads = [threading.Thread(target=_writer, args=(WriteSession, stop, args.batch, args.hold, written, args.seed_rows))]
+    for worker in range(args.readers):
+        category = None if worker % 2 == 0 else "economy"
+        threads.append(threading.Thread(target=_reader, args=(ReadSession, stop, latencies, errors, category)))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    writer_engine.dispose()
+    reader_engine.dispose()
+
+    label = "perf mode (WAL, split pools)" if perf_mode else "default (rollback journal)"
+    print(f"\n{label}")
+    print(f"  rows written during run: {written[0]}")
+    print(f"  reads: {len(latencies)}  errors: {len(errors)}")
+    if latencies:
+        print(
+            "  read latency ms: "
+            f"p50={statistics.median(latencies) * 1000:.1f} "
+            f"p95={_percentile(latencies, 0.95) * 1000:.1f} "
+            f"p99={_percentile(latencies, 0.99) * 1000:.1f} "
+            f"max={max(latencies) * 1000:.1f}"
+        )
+    if errors:
+        print(f"  first error: {errors[0]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed-rows", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=50, help="articles per simulated fetch transaction")
+    parser.add_argument("--hold", type=float, default=0.5, help="seconds the write transaction stays open")
+    parser.add_argument("--mode", choices=("both", "default", "perf"), default="both")
+    args = parser.parse_args()
+
+    if args.mode in ("both", "default"):
+        run(False, args)
+    if args.mode in ("both", "perf"):
+        run(True, args)
+
+
+if __name__ == "__main__":
+    main()
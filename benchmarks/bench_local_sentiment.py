@@ -0,0 +1,82 @@
+# Compare the local sentiment engine against LLM-enriched rows already stored in aida.db.
+#
+#   python benchmarks/bench_local_sentiment.py --limit 2000
+
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db import SessionLocal
+from app.models import Article
+from app.local_sentiment import score_sentiment
+
+
+def _impact_label(impact: str) -> str:
+    return (impact or "").split(" for ", 1)[0].strip().lower()
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Article.title, Article.summary, Article.sentiment_contextual, Article.impact_level, Article.impact_reason)
+            .filter(~Article.impact_reason.like("default:%"), ~Article.impact_reason.like("local rules:%"))
+            .order_by(Article.published_at.desc())
+            .limit(args.limit)
+            .all()
+        )
+    finally:
+        db.close()
+    if not rows:
+        print("No LLM-enriched articles found in aida.db.")
+        return
+
+    latencies_ms = []
+    sentiment_hits = 0
+    level_hits = 0
+    sentiment_confusion = Counter()
+    level_confusion = Counter()
+    for title, summary, llm_impact, llm_level, _ in rows:
+        start = time.perf_counter()
+        _, impact, _, level, _ = score_sentiment(title, summary)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        llm_label = _impact_label(llm_impact)
+        local_label = _impact_label(impact)
+        sentiment_hits += llm_label == local_label
+        sentiment_confusion[(llm_label, local_label)] += 1
+        llm_level = (llm_level or "").strip().lower()
+        level_hits += llm_level == level
+        level_confusion[(llm_level, level)] += 1
+
+    total = len(rows)
+    print(f"articles: {total}")
+    print(
+        f"latency ms: mean={statistics.mean(latencies_ms):.3f} p50={_percentile(latencies_ms, 0.5):.3f} "
+        f"p99={_percentile(latencies_ms, 0.99):.3f}"
+    )
+    print(f"impact sentiment agreement: {sentiment_hits / total:.1%}")
+    print(f"impact level agreement: {level_hits / total:.1%}")
+    print("impact level confusion (llm -> local):")
+    for (llm_level, local_level), count in sorted(level_confusion.items()):
+        print(f"  {llm_level or '-':>10} -> {local_level:<10} {count}")
+    print("impact sentiment confusion (llm -> local), top 10:")
+    for (llm_label, local_label), count in sentiment_confusion.most_common(10):
+        print(f"  {llm_label or '-':>10} -> {local_label:<10} {count}")
+
+
+if __name__ == "__main__":
+    main()
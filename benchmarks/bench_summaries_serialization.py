@@ -0,0 +1,131 @@
+# Compare the /summaries response paths: ORM objects validated through ArticleOut (the old path)
+# against column tuples encoded directly (app/serialization.py), with and without a fields= projection,
+# and as Arrow IPC (format=arrow) including the client-side load into pandas.
+# Runs against a throwaway database, not aida.db.
+#
+#   python benchmarks/bench_summaries_serialization.py --rows 5000 --repeat 20
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+from app.db import create_engines
+from app.models import Article, Base
+from app.pagination import summary_ordering
+from app.schema import ArticleOut
+from app import serialization
+from app.serialization import article_columns, parse_fields, rows_to_arrow, rows_to_json
+
+
+def _article(index: int, started: datetime) -> Article:
+    return Article(
+        title=f"Benchmark headline {index}",
+        summary="Central bank holds rates steady as inflation cools. " * 6,
+        sentiment_emotional="neutral",
+        sentiment_contextual="neutral for economy",
+        sentiment_confidence="0.50",
+        impact_level="important",
+        impact_reason="benchmark row",
+        image_url=f"https://example.com/bench/{index}.jpg",
+        source=f"Source {index % 40}",
+        url=f"https://example.com/bench/{index}",
+        category=("economy", "politics", "technology", "sports")[index % 4],
+        country="US",
+        published_at=started - timedelta(minutes=index),
+    )
+
+
+def _orm_path(Session) -> bytes:
+    db = Session()
+    try:
+        articles = db.query(Article).order_by(*summary_ordering("newest")).all()
+        return TypeAdapter(List[ArticleOut]).dump_json(articles)
+    finally:
+        db.close()
+
+
+def _tuple_path(Session, fields: tuple[str, ...], encode=rows_to_json) -> bytes:
+    db = Session()
+    try:
+        rows = db.query(*article_columns(fields)).order_by(*summary_ordering("newest")).all()
+        return encode(rows, fields)
+    finally:
+        db.close()
+
+
+def _json_client(body: bytes) -> bytes:
+    pd.DataFrame(json.loads(body))
+    return body
+
+
+def _arrow_client(body: bytes) -> bytes:
+    # What an analytics client does with format=arrow: one columnar read, no per-row parsing.
+    serialization.pyarrow.ipc.open_stream(body).read_pandas()
+    return body
+
+
+def _measure(label: str, run, repeat: int) -> None:
+    run()
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(run())
+        timings.append(time.perf_counter() - started)
+    print(
+        f"  {label:<34} median={statistics.median(timings) * 1000:7.1f} ms  "
+        f"min={min(timings) * 1000:7.1f} ms  body={size / 1024:8.1f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fields", default="id,title,source,published_at,impact_level,category")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aida-bench-")
+    writer_engine, reader_engine = create_engines(f"sqlite:///{os.path.join(workdir, 'bench.db')}", perf_mode=True)
+    Base.metadata.create_all(bind=writer_engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
+    now = datetime.utcnow()
+    db = Session()
+    db.add_all(_article(index, now) for index in range(args.rows))
+    db.commit()
+    db.close()
+
+    encoder = "orjson" if serialization.orjson is not None else "json (install orjson for the fast encoder)"
+    print(f"{args.rows} articles, {args.repeat} runs each, encoder: {encoder}")
+    _measure("ORM + ArticleOut validation", lambda: _orm_path(ReadSession), args.repeat)
+    _measure("column tuples, all fields", lambda: _tuple_path(ReadSession, parse_fields(None)), args.repeat)
+    _measure(f"column tuples, fields={args.fields}", lambda: _tuple_path(ReadSession, parse_fields(args.fields)), args.repeat)
+    if serialization.pyarrow is not None:
+        _measure("column tuples, all fields, arrow", lambda: _tuple_path(ReadSession, parse_fields(None), rows_to_arrow), args.repeat)
+        json_body = _tuple_path(ReadSession, parse_fields(None))
+        arrow_body = _tuple_path(ReadSession, parse_fields(None), rows_to_arrow)
+        print("client side, parse the full body into a DataFrame:")
+        _measure("json -> pandas", lambda: _json_client(json_body), args.repeat)
+        _measure("arrow -> pandas", lambda: _arrow_client(arrow_body), args.repeat)
+    else:
+        print("  (install pyarrow to include format=arrow)")
+    writer_engine.dispose()
+    reader_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# tests/conftest.py - point the app's databases at a scratch directory before any app module loads
+
+import os
+import sys
+import tempfile
+
+# app/db.py opens ./aida.db and app/retention.py the archive file at import time.
+_scratch = tempfile.mkdtemp(prefix="aida-tests-")
+os.environ["AIDA_ARCHIVE_DB_PATH"] = os.path.join(_scratch, "aida_archive.db")
+os.environ["AIDA_RETENTION_DAYS"] = "30"
+os.chdir(_scratch)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import pytest
+
+from app.category_rules import DEFAULT_MIN_MARGIN, DEFAULT_MIN_SCORE, DEFAULT_RULES, CategoryRuleIndex
+
+_INDEX = CategoryRuleIndex(DEFAULT_RULES, min_score=DEFAULT_MIN_SCORE, min_margin=DEFAULT_MIN_MARGIN)
+
+
+@pytest.mark.parametrize(
+    "text, label",
+    [
+        ("Talks resume in Stockholm", "stocks"),
+        ("Governments stockpile grain", "stocks"),
+        ("For example, the plan was examined twice", "education"),
+        ("Fossil fuels still dominate", "science"),
+        ("A concerted effort by regulators", "entertainment"),
+        ("Visa reported higher payment volumes", "travel"),
+        ("Advances in cryptography", "crypto"),
+        ("The hospitality sector hires again", "health"),
+    ],
+)
+def test_word_stems_do_not_hit_other_words(text, label):
+    assert label not in _INDEX.score(text)
+
+
+@pytest.mark.parametrize(
+    "text, label",
+    [
+        ("Stocks rallied", "stocks"),
+        ("Exams were postponed", "education"),
+        ("Fossils found in a quarry", "science"),
+        ("Fossil fuels still dominate", "energy"),
+        ("Two concerts were cancelled", "entertainment"),
+        ("New rules for visas", "travel"),
+        ("Cryptocurrency prices fell", "crypto"),
+        ("Dozens were hospitalised", "health"),
+    ],
+)
+def test_spelled_out_word_forms_still_hit(text, label):
+    assert label in _INDEX.score(text)
+
+
+def test_lookalike_words_do_not_decide_a_category():
+    label, _ = _INDEX.decide("Stockholm talks examined a concerted stockpile plan for example")
+    assert label is None
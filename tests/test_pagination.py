@@ -0,0 +1,34 @@
+import base64
+import json
+
+import pytest
+
+from app.pagination import InvalidCursorError, decode_cursor
+
+
+def _cursor(sort, lead_value, article_id=1):
+    raw = json.dumps({"s": sort, "k": [lead_value, "2026-10-01T00:00:00", article_id]}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "sort, lead_value",
+    [
+        ("priority", [1]),
+        ("priority", {"rank": 1}),
+        ("priority", "2"),
+        ("priority", True),
+        ("priority", 1.5),
+        ("priority", 2**70),
+        ("confidence", float("nan")),
+        ("newest", 1),
+    ],
+)
+def test_rejects_a_sort_value_the_column_cannot_hold(sort, lead_value):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(_cursor(sort, lead_value), sort)
+
+
+@pytest.mark.parametrize("sort, lead_value", [("priority", 2), ("priority", None), ("confidence", 0.75), ("confidence", 1)])
+def test_accepts_sort_values_of_the_column_type(sort, lead_value):
+    assert decode_cursor(_cursor(sort, lead_value), sort)[0] == lead_value
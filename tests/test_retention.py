@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+
+from app.db import SessionLocal
+from app.models import Article
+from app.retention import ArchiveSessionLocal, ArchivedArticle, run_retention
+
+_LATER = datetime.now(timezone.utc) + timedelta(days=3650)
+
+
+def _store(urls, title="first"):
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Article(title=title, summary="s", url=url, source="test", category="General", country="US",
+                    published_at=datetime(2024, 1, 1))
+            for url in urls
+        )
+        db.commit()
+        return sorted(db.scalars(select(Article.id).where(Article.url.in_(urls))).all())
+    finally:
+        db.close()
+
+
+def _live_count():
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count()).select_from(Article))
+    finally:
+        db.close()
+
+
+def _archived(urls):
+    db = ArchiveSessionLocal()
+    try:
+        return {row.url: row.title for row in db.scalars(select(ArchivedArticle).where(ArchivedArticle.url.in_(urls)))}
+    finally:
+        db.close()
+
+
+def setup_function():
+    for session, model in ((SessionLocal(), Article), (ArchiveSessionLocal(), ArchivedArticle)):
+        session.execute(delete(model))
+        session.commit()
+        session.close()
+
+
+def test_reused_ids_are_archived_again():
+    first = [f"https://example.com/first/{n}" for n in range(5)]
+    second = [f"https://example.com/second/{n}" for n in range(3)]
+    first_ids = _store(first)
+    run_retention(now=_LATER)
+    assert _live_count() == 0
+
+    # The live table is empty, so SQLite hands out the same ids again.
+    assert _store(second) == first_ids[:3]
+    result = run_retention(now=_LATER)
+
+    assert result["last_archived"] == 3
+    assert _live_count() == 0
+    assert set(_archived(first + second)) == set(first + second)
+
+
+def test_url_already_archived_keeps_the_newer_copy():
+    url = "https://example.com/story"
+    _store([url], title="old")
+    run_retention(now=_LATER)
+    _store([url], title="new")
+    run_retention(now=_LATER)
+
+    assert _live_count() == 0
+    assert _archived([url]) == {url: "new"}